@@ -1,17 +1,19 @@
 import random
 from stack import Stack #PUT STACK ELEMENT IN GET NEW POSITION
+from board import Board, EMPTY, PLAYER, GOLD
 
 class MazeGame:
     '''
     A game where a player moves through a grid to reach some treasure.
     '''
 
-    def __init__(self, width, height, player, monster):
+    def __init__(self, width, height, player, monster, board=None):
         '''
-        (MazeGame, Player) -> None
+        (MazeGame, Player, Monster, Board) -> None
         Construct a new MazeGame with the given width and height,
         and a player. MazeGame should also place a "gold" at
         a randomly chosen coordinate on the far edge of the grid.
+        If a board is given it is reset and reused for this game.
         '''
         
         self.width = width
@@ -21,7 +23,11 @@ class MazeGame:
         self.gold_coord = (width-1, random.randint(1, height-1)) 
         self.monster = monster
         
-        self.grid = []
+        self.board = board if board is not None else Board()
+        self.observers = [] # callables given each printed frame, e.g. a spectator broadcaster
+        self.quiet = False # when True nothing is printed, e.g. for simulated games
+        self.fighting = False # True while the player stands on a living monster
+        self.fleeing = False # True once the player has got away but not yet run off
         self.make_grid()
         self.stack = Stack() #sets the stack to be accesible
         
@@ -29,45 +35,43 @@ class MazeGame:
         '''
         (MazeGame) -> None
         Given width, height and positions of player and gold,
-        append things to this maze's grid.
+        reset this maze's board and place them on it.
         '''
         
-        for i in range(self.height):
-            self.grid.append([])
-            for j in range(self.width):
-                self.grid[i].append('(_)') 
-        
-        self.grid[self.player.y][self.player.x] = '(x)'
-        self.grid[self.gold_coord[1]][self.gold_coord[0]] = '(*)'
-        self.grid[self.monster.y][self.monster.x] = "(_)"
+        self.board.reset(self.width, self.height)
+        self.board.set(self.player.x, self.player.y, PLAYER)
+        self.board.set(self.gold_coord[0], self.gold_coord[1], GOLD)
+        self.board.set(self.monster.x, self.monster.y, EMPTY)
         #FOR TESTING PURPOSES USE THE BELOW LINE
-        #self.grid[self.monster.y][self.monster.x] = "(o)"
+        #self.board.set(self.monster.x, self.monster.y, RIVAL) # after importing RIVAL, drawn as (o), from board
     
     def play_game(self):
         '''
-        (MazeGame) -> None
+        (MazeGame) -> bool
         Play the game, with each player taking turns making a move, until
         one player reaches the gold. Players each keep track of their wins and losses.
+        Return whether the player won.
         '''
         
         # print out the starting state of the maze
-        print(self)
-        print('------------')
+        self.show()
         
         while (not (self.player.x, self.player.y) == (self.gold_coord[0], self.gold_coord[1])): # if no one has reached the gold yet, play one turn of the game (one player makes one move)
             if self.player.hp == 0:
-                print("You are dead.")
+                self.say("You are dead.")
                 break
             else:
                 self.play_one_turn()
-        if self.player.hp == 0: #RESET THE GAME AND HPS
-            print("And this game is over.")
+        won = self.player.hp != 0
+        if not won: #RESET THE GAME AND HPS
+            self.say("And this game is over.")
             self.player.hp = 3
             self.monster.hp = 3
         else:
-            print('Yay, you won, {}!'.format(self.player.name))
+            self.say('Yay, you won, {}!'.format(self.player.name))
             self.player.hp = 3
             self.monster.hp = 3
+        return won
 
 
     def get_new_position(self, d):
@@ -97,20 +101,24 @@ class MazeGame:
         # keep track of the Player's current position before they move
         old_x, old_y = self.player.x, self.player.y 
         self.player.move(new_position)
-        self.grid[self.player.y][self.player.x] = self.grid[old_y][old_x]
-        self.grid[old_y][old_x] = '(_)'
+        self.board.move((old_x, old_y), (self.player.x, self.player.y))
 
         self.stack.push((old_y, old_x))
         
-    def play_one_turn(self):
+    def play_one_turn(self, direction=None):
         '''
-        (MazeGame) -> None
+        (MazeGame, str) -> None
         Play one turn of the game. Turn could involve moving one place,
         attempting to move one place, or undoing the most recent move.
+        If no direction is given, ask the player for one, and for their
+        choices in any fight it leads to; otherwise a fight is left for
+        later calls to tick.
         '''
 
         # get the direction the Player wants to move
-        direction = self.player.get_direction()
+        asked = direction is None
+        if direction is None:
+            direction = self.player.get_direction()
         direction_dict = {"N": (0, -1), "S": (0, 1), "E": (1, 0), "W": (-1, 0)}
 
         if (direction == 'U'):
@@ -122,39 +130,67 @@ class MazeGame:
             if new_position: # this is the same as saying "if new_position != None"                
                 if new_position == (self.monster.x, self.monster.y): #condition for being on a monster tile
                     self.update_grid(new_position)
-                    print("The monster has been found!")
-                    print("If you are unlucky, the monster will damage you instead. If you are lucky, you can flee.")
-                    while self.player.hp > 0 and self.monster.hp > 0:
-                        decision = input("Fight or flight?: ") #PROMPTS USER TO PICK ATTACK OR FLEE
-                        if decision.lower() == "flight":
-                            roll = random.randint(0, 3)
-                            if roll == 1:
-                                direction = input("You have fled. Which direction now?: ")
-                                new_position = self.get_new_position(direction.upper())
-                                self.update_grid(new_position)
-                                break
-                            else:
-                                self.player.hp = self.player.hp - 1
-                                print("You have {} remaining HP. The monster has {} remaining HP.".format(self.player.hp, self.monster.hp))
-                        elif decision.lower() == "fight":
-                            roll = random.randint(0, 3)
-                            if roll == 2:
-                                self.player.hp = self.player.hp - 1
-                                print("You have {} remaining HP. The monster has {} remaining HP.".format(self.player.hp, self.monster.hp))
-                            else:
-                                self.monster.hp = self.monster.hp - 1
-                                print("You have {} remaining HP. The monster has {} remaining HP.".format(self.player.hp, self.monster.hp))
-                        else:
-                            print("You chose wrong, rechoose.")
+                    self.say("The monster has been found!")
+                    self.say("If you are unlucky, the monster will damage you instead. If you are lucky, you can flee.")
+                    self.fighting = self.player.hp > 0 and self.monster.hp > 0
+                    if asked:
+                        while self.fighting:
+                            self.fight_round(self.player.get_decision()) #PROMPTS USER TO PICK ATTACK OR FLEE
+                        while self.fleeing:
+                            self.flee(self.player.get_flee_direction())
+                    elif self.fighting:
+                        self.say("Fight or flight? (F to fight, L to flee)")
                 else:
                     self.update_grid(new_position)
-                    print("Player {} moved {}.".format(self.player.name, direction))
+                    self.say("Player {} moved {}.".format(self.player.name, direction))
             else:
-                print("Player {} attempted to move {}. Way is blocked.".format(self.player.name, direction))
+                self.say("Player {} attempted to move {}. Way is blocked.".format(self.player.name, direction))
 
         # print current state of game
-        print(self)
-        print('------------')
+        self.show()
+
+    def fight_round(self, decision):
+        '''
+        (MazeGame, str) -> None
+        Play one round of the fight with the monster, where decision is
+        "fight" or "flight". The fight ends when either runs out of HP, or
+        when the player gets away; they then have to flee (see flee).
+        '''
+        if decision.lower() == "flight":
+            roll = random.randint(0, 3)
+            if roll == 1:
+                self.fighting = False
+                self.fleeing = True
+                return
+            else:
+                self.player.hp = self.player.hp - 1
+                self.say("You have {} remaining HP. The monster has {} remaining HP.".format(self.player.hp, self.monster.hp))
+        elif decision.lower() == "fight":
+            roll = random.randint(0, 3)
+            if roll == 2:
+                self.player.hp = self.player.hp - 1
+                self.say("You have {} remaining HP. The monster has {} remaining HP.".format(self.player.hp, self.monster.hp))
+            else:
+                self.monster.hp = self.monster.hp - 1
+                self.say("You have {} remaining HP. The monster has {} remaining HP.".format(self.player.hp, self.monster.hp))
+        else:
+            self.say("You chose wrong, rechoose.")
+        if self.player.hp == 0 or self.monster.hp == 0:
+            self.fighting = False
+
+    def flee(self, direction):
+        '''
+        (MazeGame, str) -> None
+        Run one step from the monster in the given direction. If that way
+        is blocked the player is still fleeing and has to pick another.
+        '''
+        direction = direction.upper()
+        new_position = self.get_new_position(direction) if direction in ("N", "S", "E", "W") else None
+        if new_position:
+            self.update_grid(new_position)
+            self.fleeing = False
+        else:
+            self.say("Way is blocked. Which direction now?")
 
     def undo_last_move(self):
         '''
@@ -163,23 +199,90 @@ class MazeGame:
         If no moves were previously made, print out the message "Can't undo".
         '''
         if self.stack.isEmpty():
-            print("Invalid. There was no past move.")
+            self.say("Invalid. There was no past move.")
         else:
             last_move = self.stack.pop()
-            self.grid[self.player.y][self.player.x] = "(_)"
+            self.board.set(self.player.x, self.player.y, EMPTY)
             self.player.y = last_move[0]
             self.player.x = last_move[1]
-            self.grid[last_move[0]][last_move[1]] = '(x)'
+            self.board.set(last_move[1], last_move[0], PLAYER)
     
+    def is_over(self):
+        '''
+        (MazeGame) -> bool
+        Return whether the player has reached the gold or died.
+        '''
+        return (self.player.x, self.player.y) == self.gold_coord or self.player.hp == 0
+
+    def move_monster(self):
+        '''
+        (MazeGame) -> None
+        Move a living monster one random step, staying on the grid and off
+        the gold and the player.
+        '''
+        if self.monster.hp == 0:
+            return
+        dx, dy = random.choice([(0, -1), (0, 1), (1, 0), (-1, 0)])
+        new_x, new_y = self.monster.x + dx, self.monster.y + dy
+        if (0 <= new_x < self.width) and (0 <= new_y < self.height) and \
+           (new_x, new_y) not in (self.gold_coord, (self.player.x, self.player.y)):
+            self.monster.move((new_x, new_y))
+
+    def tick(self, key):
+        '''
+        (MazeGame, str or None) -> None
+        Advance a real-time game by one tick. During a fight the player's key
+        decides it, a round at a time: F to fight, L to try to flee, then a
+        direction to run once they get away. Otherwise the monster wanders,
+        then the player takes a turn if they have pressed a direction (or U)
+        since the last tick. Nothing here waits for input.
+        '''
+        if self.fighting:
+            if key is not None and key in "FL":
+                self.fight_round("fight" if key == "F" else "flight")
+                if self.fighting:
+                    self.say("Fight or flight? (F to fight, L to flee)")
+                elif self.fleeing:
+                    self.say("You have fled. Which direction now?")
+                self.show()
+        elif self.fleeing:
+            if key is not None and key in "NSEW":
+                self.flee(key)
+                self.show()
+        else:
+            self.move_monster()
+            if key is not None and key in "NSEWU":
+                self.play_one_turn(key)
+
+    def say(self, message):
+        '''
+        (MazeGame, str) -> None
+        Print a message about the game, unless the game is quiet.
+        '''
+        if not self.quiet:
+            print(message)
+
+    def show(self):
+        '''
+        (MazeGame) -> None
+        Print the current state of the game, and pass the same text to
+        every observer watching this game.
+        '''
+        if self.quiet and not self.observers:
+            return
+        s = str(self)
+        if not self.quiet:
+            print(s)
+            print('------------')
+        for observer in self.observers:
+            observer(s)
+
     def __str__(self):
         '''
         (MazeGame) -> str
         Return string representation of the game's grid.
         '''
-        s = ''
-        for row in self.grid:
-            s += ''.join(row) + "\n"
-        return s.strip()
+        return str(self.board)
 
 
 class Player:
@@ -200,6 +303,14 @@ class Player:
             direction = direction.upper()
         return direction
 
+    def get_decision(self):
+        '''Ask whether to fight the monster or flee from it.'''
+        return input("Fight or flight?: ")
+
+    def get_flee_direction(self):
+        '''Ask which direction to run after fleeing the monster.'''
+        return input("You have fled. Which direction now?: ")
+
     def move(self, newpos):
         self.x = newpos[0]
         self.y = newpos[1]
@@ -210,6 +321,10 @@ class Monster: #CLASS WAS ADDED BUT VERY BASIC
         self.x = x
         self.y = y
         self.hp = 3
+
+    def move(self, newpos):
+        self.x = newpos[0]
+        self.y = newpos[1]
         
 
 def main():
@@ -221,10 +336,11 @@ def main():
     name = input("What is your name? ")
     p1 = Player(name, 0, 0) # make a player at position (0,0)
     monster = Monster(random.randint(0, width-2), random.randint(1, height-1))
+    board = Board() # reused by every round
     
     play_again = True
     while play_again:
-        g = MazeGame(width, height, p1, monster)
+        g = MazeGame(width, height, p1, monster, board)
         g.play_game()
         # reset player locations at end of round
         p1.move((0,0))
@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+from multiprocessing import Pool
+
+from MazeFight import MazeGame, Monster, Player
+from board import Board
+
+
+class ScriptedPlayer(Player):
+    '''
+    A Player that plays itself. Each move heads for the gold: "east-first"
+    walks along its row to the far edge and then up or down, "south-first"
+    gets onto the gold's row first, and "random" picks at random among the
+    moves that get closer. On meeting the monster it always gives the same
+    answer (strategy "fight" or "flight"), and flees towards the gold.
+    '''
+
+    def __init__(self, route, strategy):
+        Player.__init__(self, 'scripted', 0, 0)
+        self.route = route
+        self.strategy = strategy
+        self.game = None
+
+    def closer_moves(self):
+        '''Return the moves that bring this player closer to the gold.'''
+        gold_x, gold_y = self.game.gold_coord
+        moves = []
+        if gold_x > self.x:
+            moves.append("E")
+        if gold_y > self.y:
+            moves.append("S")
+        if gold_y < self.y:
+            moves.append("N")
+        return moves
+
+    def get_direction(self):
+        moves = self.closer_moves()
+        if self.route == "random":
+            return random.choice(moves)
+        if self.route == "south-first" and len(moves) > 1:
+            return moves[1]
+        return moves[0]
+
+    def get_decision(self):
+        return self.strategy
+
+    def get_flee_direction(self):
+        for d in self.closer_moves() + ["N", "S", "W", "E"]:
+            if self.game.get_new_position(d):
+                return d
+
+
+def play_one_game(width, height, route, strategy, board=None):
+    '''
+    Play one quiet MazeFight game on a width x height board, placing the
+    gold and monster the way main() does, and return (won, monster position).
+    If a board is given it is reused rather than allocating a new one.
+    '''
+    player = ScriptedPlayer(route, strategy)
+    monster = Monster(random.randint(0, width-2), random.randint(1, height-1))
+    game = MazeGame(width, height, player, monster, board)
+    game.quiet = True
+    player.game = game
+    return game.play_game(), (monster.x, monster.y)
+
+
+def chunk_seed(base_seed, chunk):
+    '''Return the seed of one chunk's random stream, independent of the others.'''
+    digest = hashlib.sha256('{}:{}'.format(base_seed, chunk).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def play_chunk(job):
+    '''
+    Play one chunk of games in a worker process, with its own seeded random
+    stream, and return the tallies: {(width, height): [games, wins]} and
+    {(width, height, monster x, monster y): [games, wins]}.
+    '''
+    base_seed, chunk, sizes, games, route, strategy = job
+    random.seed(chunk_seed(base_seed, chunk))
+    by_size = {}
+    by_position = {}
+    board = Board()
+    for n in range(games):
+        width, height = sizes[n % len(sizes)]
+        won, (mx, my) = play_one_game(width, height, route, strategy, board)
+        for tally, key in ((by_size, (width, height)), (by_position, (width, height, mx, my))):
+            counts = tally.setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += won
+    return by_size, by_position
+
+
+def wilson_half_width(wins, games, z=1.96):
+    '''Return the half-width of the Wilson score interval for a win rate.'''
+    if games == 0:
+        return 1.0
+    p = wins / games
+    return z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+
+
+def run_sweep(sizes, total_games, route='random', strategy='fight', seed=0,
+              chunk_size=10000, tolerance=None, workers=None, progress=print):
+    '''
+    Play up to total_games scripted games spread over the given board sizes,
+    in chunks across a pool of worker processes, folding in each chunk's
+    tallies as it arrives. After every chunk, progress is called with the
+    running totals; if tolerance is given the sweep stops early once every
+    board size's 95% interval on the win rate is narrower than +/- tolerance.
+
+    Return (by_size, by_position) tallies as {key: [games, wins]}.
+    '''
+    sizes = [tuple(size) for size in sizes]
+    chunks = (total_games + chunk_size - 1) // chunk_size
+    jobs = ((seed, c, sizes, min(chunk_size, total_games - c * chunk_size), route, strategy)
+            for c in range(chunks))
+    by_size = {}
+    by_position = {}
+    with Pool(workers) as pool:
+        for chunk_size_tally, chunk_position_tally in pool.imap_unordered(play_chunk, jobs):
+            for total, part in ((by_size, chunk_size_tally), (by_position, chunk_position_tally)):
+                for key, (games, wins) in part.items():
+                    counts = total.setdefault(key, [0, 0])
+                    counts[0] += games
+                    counts[1] += wins
+            progress(by_size)
+            if tolerance is not None and len(by_size) == len(sizes) and \
+               all(wilson_half_width(wins, games) < tolerance for games, wins in by_size.values()):
+                pool.terminate()
+                break
+    return by_size, by_position
+
+
+def describe(by_size):
+    '''Return a one-line-per-size summary of win and death rates.'''
+    lines = []
+    for (width, height), (games, wins) in sorted(by_size.items()):
+        lines.append('{}x{}: {} games, win {:.4f} +/- {:.4f}, death {:.4f}'.format(
+            width, height, games, wins / games, wilson_half_width(wins, games),
+            (games - wins) / games))
+    return '\n'.join(lines)
+
+
+def main():
+    '''Run a balance sweep from the command line.'''
+    parser = argparse.ArgumentParser(description='Monte Carlo balance analysis of MazeFight.')
+    parser.add_argument('--sizes', nargs='+', default=['4x4', '6x6', '10x10'],
+                        help='board sizes as WIDTHxHEIGHT')
+    parser.add_argument('--games', type=int, default=1000000)
+    parser.add_argument('--route', choices=['east-first', 'south-first', 'random'], default='random')
+    parser.add_argument('--strategy', choices=['fight', 'flight'], default='fight')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help='stop once every win rate is known to within +/- this')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=None, help='write per-position tallies here as JSON')
+    args = parser.parse_args()
+
+    sizes = [tuple(int(n) for n in size.split('x')) for size in args.sizes]
+    by_size, by_position = run_sweep(
+        sizes, args.games, args.route, args.strategy, args.seed, args.chunk_size,
+        args.tolerance, args.workers,
+        progress=lambda tally: print(describe(tally) + '\n------------', flush=True))
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump([{'width': w, 'height': h, 'monster': [mx, my], 'games': games, 'wins': wins}
+                       for (w, h, mx, my), (games, wins) in sorted(by_position.items())], f)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+EMPTY = 0
+PLAYER = 1
+RIVAL = 2
+GOLD = 3
+
+CELL_TEXT = ('(_)', '(x)', '(o)', '(*)') # how each kind of cell is printed
+
+
+class Board:
+    '''
+    The cells of a maze, stored flat in one bytearray: cell (x, y) lives at
+    index y * width + x and holds EMPTY, PLAYER, RIVAL or GOLD. A Board can
+    be reset in place for the next round, and the cells are only turned
+    into text when the board is printed.
+    '''
+
+    def __init__(self, width=0, height=0):
+        '''A new empty width x height board.'''
+        self.cells = bytearray()
+        self.reset(width, height)
+
+    def reset(self, width, height):
+        '''
+        Make every cell EMPTY. When the size is unchanged the same buffer is
+        kept, and only the cells that are not already EMPTY are written to.
+        '''
+        self.width = width
+        self.height = height
+        if len(self.cells) != width * height:
+            self.cells = bytearray(width * height)
+            return
+        cells = self.cells
+        for kind in range(1, len(CELL_TEXT)):
+            i = cells.find(kind)
+            while i != -1:
+                cells[i] = EMPTY
+                i = cells.find(kind, i + 1)
+
+    def get(self, x, y):
+        '''Return the kind of cell (x, y).'''
+        return self.cells[y * self.width + x]
+
+    def set(self, x, y, kind):
+        '''Make cell (x, y) hold the given kind.'''
+        self.cells[y * self.width + x] = kind
+
+    def move(self, old, new):
+        '''Move whatever is on (x, y) position old onto new, leaving old EMPTY.'''
+        w = self.width
+        self.cells[new[1] * w + new[0]] = self.cells[old[1] * w + old[0]]
+        self.cells[old[1] * w + old[0]] = EMPTY
+
+    def __str__(self):
+        '''Return the board as rows of printed cells.'''
+        w = self.width
+        return '\n'.join(''.join(map(CELL_TEXT.__getitem__, self.cells[i:i + w]))
+                         for i in range(0, len(self.cells), w))
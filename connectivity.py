@@ -0,0 +1,145 @@
+from array import array
+from collections import deque
+
+from pathquery import neighbours
+
+NO_COMPONENT = -1
+
+
+class Components:
+    '''
+    Connected-component labels for a grid stored flat in a passable
+    bytearray (like PathQuery's), kept up to date as cells open and close.
+
+    Opening a cell merges the components around it by relabelling all but
+    the largest. Closing a cell may split its component: a search is grown
+    from each of its former neighbours in turn, searches that meet are
+    joined, and any group of searches that runs out of cells before meeting
+    the rest is given a new label. Both cost time in proportion to the
+    smaller side of the merge or split, rather than the whole grid.
+    '''
+
+    def __init__(self, passable, width: int) -> None:
+        '''Label every connected component of the given grid.'''
+        self.passable = passable
+        self.width = width
+        self.labels = array('i', [NO_COMPONENT]) * len(passable)
+        self.sizes = {}
+        self._next_label = 0
+        for i in range(len(passable)):
+            if passable[i] and self.labels[i] == NO_COMPONENT:
+                self._flood(i, self._new_label())
+
+    @classmethod
+    def restore(cls, passable, width: int, labels, sizes: dict) -> 'Components':
+        '''
+        Return Components rebuilt from labels and sizes saved earlier (see
+        mapcache), without labelling the grid again.
+        '''
+        components = cls.__new__(cls)
+        components.passable = passable
+        components.width = width
+        components.labels = labels
+        components.sizes = sizes
+        components._next_label = max(sizes, default=-1) + 1
+        return components
+
+    def _new_label(self) -> int:
+        '''Return a label no component has used yet.'''
+        self._next_label += 1
+        return self._next_label - 1
+
+    def _flood(self, i: int, label: int) -> None:
+        '''Give label to every cell connected to flat index i.'''
+        old = self.labels[i]
+        count = 1
+        self.labels[i] = label
+        queue = deque([i])
+        while queue:
+            for j in neighbours(self.passable, self.width, queue.popleft()):
+                if self.labels[j] == old:
+                    self.labels[j] = label
+                    count += 1
+                    queue.append(j)
+        self.sizes[label] = self.sizes.get(label, 0) + count
+        if old != NO_COMPONENT:
+            self.sizes[old] -= count
+            if self.sizes[old] == 0:
+                del self.sizes[old]
+
+    def connected(self, i: int, j: int) -> bool:
+        '''Return whether flat indexes i and j are passable and connected.'''
+        return self.labels[i] != NO_COMPONENT and self.labels[i] == self.labels[j]
+
+    def cell_opened(self, i: int) -> None:
+        '''Update after flat index i has become passable.'''
+        around = {self.labels[j] for j in neighbours(self.passable, self.width, i)}
+        if not around:
+            label = self._new_label()
+            self.labels[i] = label
+            self.sizes[label] = 1
+            return
+        largest = max(around, key=self.sizes.__getitem__)
+        self.labels[i] = largest
+        self.sizes[largest] += 1
+        for j in neighbours(self.passable, self.width, i):
+            if self.labels[j] != largest:
+                self._flood(j, largest)
+
+    def cell_closed(self, i: int) -> None:
+        '''Update after flat index i has stopped being passable.'''
+        label = self.labels[i]
+        if label == NO_COMPONENT:
+            return
+        self.labels[i] = NO_COMPONENT
+        self.sizes[label] -= 1
+        if self.sizes[label] == 0:
+            del self.sizes[label]
+        seeds = neighbours(self.passable, self.width, i)
+        if len(seeds) < 2:
+            return
+
+        # one search per former neighbour; searches that meet are joined
+        owner = {s: k for k, s in enumerate(seeds)}
+        parent = list(range(len(seeds)))
+        queues = [deque([s]) for s in seeds]
+
+        def find(k):
+            while parent[k] != k:
+                k = parent[k]
+            return k
+
+        active = set(range(len(seeds)))
+        while len(active) > 1:
+            for k in list(active):
+                if k not in active:
+                    continue
+                queue = queues[k]
+                if not queue:
+                    # this group is cut off from the others: it becomes a new component
+                    active.discard(k)
+                    cells = [c for c, o in owner.items() if find(o) == k]
+                    new = self._new_label()
+                    for c in cells:
+                        self.labels[c] = new
+                    self.sizes[new] = len(cells)
+                    self.sizes[label] -= len(cells)
+                    if len(active) == 1:
+                        break
+                    continue
+                u = queue.popleft()
+                for v in neighbours(self.passable, self.width, u):
+                    if v not in owner:
+                        owner[v] = k
+                        queue.append(v)
+                    else:
+                        other = find(owner[v])
+                        if other != k:
+                            # join the smaller group into the larger one
+                            big, small = (k, other) if len(queues[k]) >= len(queues[other]) else (other, k)
+                            parent[small] = big
+                            queues[big].extend(queues[small])
+                            queues[small] = deque()
+                            active.discard(small)
+                            k = big
+                            queue = queues[k]
@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from drillbot import DrillBot, Map, load_map
+
+MAX_ATTEMPTS = 3 # times a map may kill its worker, running on its own, before we give up on it
+
+
+def process_map(path: str) -> dict:
+    '''
+    Load, validate and headlessly explore the map stored at path, and return
+    a dict describing the result: its status ("ok", "invalid" or "error"),
+    any validation problems, the gems collected, the distance travelled and
+    how long each stage took.
+    '''
+    result = {'map': path}
+    began = time.perf_counter()
+    try:
+        m = Map(load_map(path))
+        result['tiles'] = sum(len(row) for row in m.tiles)
+        result['load_seconds'] = time.perf_counter() - began
+
+        checked = time.perf_counter()
+        problems = m.find_problems()
+        result['validate_seconds'] = time.perf_counter() - checked
+        if problems:
+            result['status'] = 'invalid'
+            result['problems'] = problems
+            return result
+
+        explored = time.perf_counter()
+        d = DrillBot(m, headless=True)
+        d.explore(m.start)
+        result['explore_seconds'] = time.perf_counter() - explored
+        result['status'] = 'ok'
+        result['storage'] = d.storage
+        result['distance'] = d.distance
+    except Exception as e:
+        result['status'] = 'error'
+        result['problems'] = ['{}: {}'.format(type(e).__name__, e)]
+    return result
+
+
+def run_alone(path: str) -> dict:
+    '''
+    Process the map at path in a pool of its own, so a crash can only be
+    its fault. Return its result, or None if the worker process died.
+    '''
+    pool = ProcessPoolExecutor(max_workers=1)
+    try:
+        return pool.submit(process_map, path).result()
+    except BrokenProcessPool:
+        return None
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def already_done(report: str) -> set:
+    '''
+    Return the set of map paths that already have a line in the report
+    file, so an interrupted batch can pick up where it left off.
+    '''
+    done = set()
+    if os.path.exists(report):
+        with open(report) as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['map'])
+                except (ValueError, KeyError):
+                    pass # a half-written line from a previous crash
+    return done
+
+
+class Tally:
+    '''Running totals across every map written to the report.'''
+
+    def __init__(self) -> None:
+        self.statuses = {}
+        self.storage = {}
+        self.distance = 0
+        self.seconds = 0.0
+
+    def add(self, result: dict) -> None:
+        '''Fold one map's result into the totals.'''
+        status = result['status']
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        for gem, count in result.get('storage', {}).items():
+            self.storage[gem] = self.storage.get(gem, 0) + count
+        self.distance += result.get('distance', 0)
+        for key in ('load_seconds', 'validate_seconds', 'explore_seconds'):
+            self.seconds += result.get(key, 0.0)
+
+    def __str__(self) -> str:
+        return 'maps: {}\ngems: {}\ntotal distance: {}\nworker seconds: {:.2f}'.format(
+            self.statuses, self.storage, self.distance, self.seconds)
+
+
+def run_batch(paths: list, report: str, workers: int = None) -> Tally:
+    '''
+    Process every map in paths across a pool of worker processes, appending
+    one JSON line per map to report as soon as it finishes. Maps already in
+    the report are skipped.
+
+    If a worker process dies, the whole pool breaks: maps that had already
+    finished are recorded, and every map that was still running becomes a
+    suspect. Suspects are then run one at a time in a pool of their own, so
+    a map that crashes its worker can not take healthy maps down with it;
+    one that crashes MAX_ATTEMPTS times on its own is recorded as
+    "crashed". Then the pool is rebuilt for the rest of the maps.
+    '''
+    done = already_done(report)
+    todo = [p for p in paths if p not in done]
+    suspects = []
+    attempts = {}
+    tally = Tally()
+    workers = workers or os.cpu_count() or 1
+
+    with open(report, 'a') as out:
+        def record(result):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+            tally.add(result)
+
+        while todo or suspects:
+            if suspects:
+                path = suspects.pop()
+                result = run_alone(path)
+                if result is not None:
+                    record(result)
+                    continue
+                attempts[path] = attempts.get(path, 0) + 1
+                if attempts[path] >= MAX_ATTEMPTS:
+                    record({'map': path, 'status': 'crashed'})
+                else:
+                    suspects.append(path)
+                continue
+
+            running = {}
+            pool = ProcessPoolExecutor(max_workers=workers)
+            try:
+                while todo or running:
+                    # keep a bounded number of maps in flight so results stream out
+                    while todo and len(running) < workers * 4:
+                        path = todo.pop()
+                        running[pool.submit(process_map, path)] = path
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        result = future.result()
+                        del running[future]
+                        record(result)
+            except BrokenProcessPool:
+                for future, path in running.items():
+                    # maps that finished in the same batch as the crash still count
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        record(future.result())
+                    else:
+                        suspects.append(path)
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+    return tally
+
+
+def main():
+    '''Run a batch over the map files given on the command line.'''
+    parser = argparse.ArgumentParser(
+        description='Validate and explore every drillbot map in a directory.')
+    parser.add_argument('map_dir', help='directory of map text files')
+    parser.add_argument('report', help='JSON-lines file to append per-map results to')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('--suffix', default='.txt',
+                        help='only process files ending with this (default: .txt)')
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.map_dir, name) for name in os.listdir(args.map_dir)
+                   if name.endswith(args.suffix))
+    print(run_batch(paths, args.report, args.workers))
+
+
+if __name__ == '__main__':
+    main()
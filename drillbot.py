@@ -1,4 +1,11 @@
+import sys
 import time
+from collections import deque
+import frontier
+from connectivity import Components
+from mapcache import EAST, NORTH, SOUTH, WEST, adjacency_masks, map_key
+from harvest import GEM_VALUES, plan_harvest
+from pathquery import PathQuery
 
 TILE_DESCS = {'(_)': 'dirt', '(r)': 'ruby', '(s)': 'sapphire',
                      '(e)': 'emerald', '(d)': 'diamond',
@@ -6,8 +13,26 @@ TILE_DESCS = {'(_)': 'dirt', '(r)': 'ruby', '(s)': 'sapphire',
 
 GEMS = ['ruby', 'sapphire', 'emerald', 'diamond']
 
+WALKABLE = frozenset(GEMS + ['dirt'])
+
+# the one shared (icon, desc) pair for each kind of tile, so Tiles don't hold their own copies
+TILE_KINDS = {sys.intern(icon): (sys.intern(icon), sys.intern(desc))
+              for icon, desc in TILE_DESCS.items()}
+
+BOT_ICONS = {} # id_num -> the icon drawn for that drillbot, built once per bot
+
+def bot_icon(id_num: int) -> str:
+    '''
+    Return the icon representing the drillbot with the given id_num.
+    '''
+    if id_num not in BOT_ICONS:
+        BOT_ICONS[id_num] = sys.intern('(' + str(id_num) + ')')
+    return BOT_ICONS[id_num]
+
 class Tile:
     '''A class to represent one spot/location on the map.'''
+
+    __slots__ = ('x', 'y', 'icon', 'desc', 'adj_tiles')
     
     def __init__(self, x: int, y: int, icon: str, desc: str) -> None:
         '''
@@ -17,12 +42,13 @@ class Tile:
 
         The Tile also keeps track of a list of Tiles that are adjacent
         to it (horizontally or vertically; Drillbots can NOT move diagonally).
+
+        Known icons share their icon/desc strings through TILE_KINDS.
         '''
         
         self.x = x
         self.y = y
-        self.icon = icon
-        self.desc = desc
+        self.icon, self.desc = TILE_KINDS.get(icon, (icon, desc))
         self.adj_tiles = []
 
     def get_visited(self, id_num: int) -> None:
@@ -30,7 +56,7 @@ class Tile:
         Update this tile's icon/desc to represent drillbot visiting the location.
         '''
 
-        self.icon = '(' + str(id_num) + ')'
+        self.icon = bot_icon(id_num)
         self.desc = 'drillbot'
         
     def get_dug(self) -> None:
@@ -58,10 +84,15 @@ class Tile:
 class Map:
     '''A class to represent a map made of several connected tiles.'''
 
-    def __init__(self, map_data: list):
+    def __init__(self, map_data: list, cache=None):
         '''
         Given a list of lists representing map data, construct Tiles to represent
         each location, connect adjacent tiles, and assign a starting point.
+
+        If a mapcache.MapCache is given and this map has been seen before, the
+        tiles are linked to their neighbours and the map's path query and
+        component indexes are loaded from it; otherwise they are built and
+        saved to it.
         
         In a valid map, the starting point will NOT be a wall, and every gem
         in the map will be accessible through up/down/left/right movements,
@@ -72,8 +103,31 @@ class Map:
         '''
 
         self.tiles = self._create_tiles(map_data)
-        self._connect_tiles()
         self.start = self.tiles[0][0]
+        self._passable = None
+        self._path_query = None
+        self._components = None
+        if cache is None:
+            self._connect_tiles()
+        else:
+            self._use_cache(cache, map_data)
+
+    def _use_cache(self, cache, map_data: list) -> None:
+        '''
+        Link the tiles and load this map's derived indexes from cache, or
+        connect the tiles as usual and build and store the indexes.
+        '''
+        key = map_key(map_data)
+        w = len(self.tiles[0])
+        stored = cache.load(key, w, len(self.tiles))
+        if stored is None:
+            self._connect_tiles()
+            cache.store(key, adjacency_masks(self.passable(), w),
+                        self.path_query(), self.components())
+        else:
+            masks, self._path_query, self._components = stored
+            self._passable = self._path_query.passable
+            self._link_tiles(masks)
 
     def _create_tiles(self, map_data: list) -> list:
         '''
@@ -101,6 +155,19 @@ class Map:
             for k in range(len(self.tiles[i])):
                 self.tiles[i][k].adj_tiles = self.find_adj(k, i)
 
+    def _link_tiles(self, masks) -> None:
+        '''
+        Give each tile the same adj_tiles _connect_tiles would, read from a
+        SOUTH/EAST/NORTH/WEST bit mask per tile (see mapcache) instead of
+        looking at every neighbour.
+        '''
+        w = len(self.tiles[0])
+        flat = [t for row in self.tiles for t in row]
+        steps = [[step for bit, step in ((SOUTH, w), (EAST, 1), (NORTH, -w), (WEST, -1))
+                  if mask & bit] for mask in range(16)]
+        for i, t in enumerate(flat):
+            t.adj_tiles = [flat[i + step] for step in steps[masks[i]]]
+
     def __len__(self) -> int:
         '''Finds the length of the given part of the map, either horizontal
         or vertical.
@@ -110,6 +177,149 @@ class Map:
             count = count + 1
         return count
 
+    def shortest_path(self, source: Tile, target: Tile) -> list:
+        '''
+        Return the list of Tiles on a shortest up/down/left/right route from
+        source to target (both included), found with a breadth-first search.
+        Return None if target can not be reached from source.
+        '''
+        if source is target:
+            return [source]
+        parents = {source: None}
+        queue = deque([source])
+        while queue:
+            tile = queue.popleft()
+            for adj in tile.adj_tiles:
+                if adj not in parents:
+                    parents[adj] = tile
+                    if adj is target:
+                        path = [adj]
+                        while parents[path[-1]] is not None:
+                            path.append(parents[path[-1]])
+                        path.reverse()
+                        return path
+                    queue.append(adj)
+        return None
+
+    def find_problems(self) -> list:
+        '''
+        Return a list of strings describing why this map is not valid: the
+        starting point is a wall, or some gem can not be reached from the
+        starting point. A valid map returns an empty list.
+        '''
+        if self.start.desc == 'wall':
+            return ['starting point is a wall']
+        reached = {self.start}
+        queue = deque([self.start])
+        while queue:
+            for adj in queue.popleft().adj_tiles:
+                if adj not in reached:
+                    reached.add(adj)
+                    queue.append(adj)
+        problems = []
+        for row in self.tiles:
+            for t in row:
+                if t.desc in GEMS and t not in reached:
+                    problems.append('{} at ({}, {}) is unreachable'.format(t.desc, t.x, t.y))
+        return problems
+
+    def path_query(self) -> PathQuery:
+        '''
+        Return the PathQuery service answering distance and path queries on
+        this map, building its landmark distance fields on first use.
+        '''
+        if self._path_query is None:
+            self._path_query = PathQuery(self.passable(), len(self.tiles[0]), len(self.tiles))
+        return self._path_query
+
+    def passable(self) -> bytearray:
+        '''
+        Return a bytearray with one entry per tile (row by row) that is 1
+        where the tile is not a wall, shared by everything derived from it.
+        '''
+        if self._passable is None:
+            self._passable = bytearray(t.desc != 'wall' for row in self.tiles for t in row)
+        return self._passable
+
+    def components(self) -> Components:
+        '''
+        Return the connected-component labels of this map, building them on
+        first use.
+        '''
+        if self._components is None:
+            self._components = Components(self.passable(), len(self.tiles[0]))
+        return self._components
+
+    def connected(self, source: Tile, target: Tile) -> bool:
+        '''
+        Return whether target can be reached from source.
+        '''
+        w = len(self.tiles[0])
+        return self.components().connected(source.y * w + source.x, target.y * w + target.x)
+
+    def add_wall(self, x: int, y: int) -> bool:
+        '''
+        Turn the tile at (x, y) into a wall (e.g. after a cave-in), updating
+        the adjacent tiles and anything derived from the map so far.
+
+        Return whether the map changed: the starting point is never turned
+        into a wall, as that would make the map invalid, and a tile that is
+        already a wall is left as it is.
+        '''
+        tile = self.tiles[y][x]
+        if tile is self.start or tile.desc == 'wall':
+            return False
+        self._set_tile(x, y, '(x)')
+        return True
+
+    def remove_wall(self, x: int, y: int, icon: str = '(_)') -> bool:
+        '''
+        Drill through the wall at (x, y), leaving the given icon (dirt by
+        default), updating the adjacent tiles and anything derived from the
+        map so far.
+
+        Return whether the map changed: a tile that is not a wall is left
+        as it is.
+        '''
+        if self.tiles[y][x].desc != 'wall':
+            return False
+        self._set_tile(x, y, icon)
+        return True
+
+    def _set_tile(self, x: int, y: int, icon: str) -> None:
+        '''
+        Change the tile at (x, y) to icon. Only that tile and its four
+        neighbours get new adj_tiles; distance fields and components are
+        repaired around the change instead of being rebuilt.
+        '''
+        tile = self.tiles[y][x]
+        was_wall = tile.desc == 'wall'
+        tile.icon, tile.desc = TILE_KINDS[icon]
+        is_wall = tile.desc == 'wall'
+        tile.adj_tiles = self.find_adj(x, y)
+        for adj_x, adj_y in ((x, y+1), (x+1, y), (x, y-1), (x-1, y)):
+            if 0 <= adj_x < len(self.tiles[0]) and 0 <= adj_y < len(self.tiles):
+                self.tiles[adj_y][adj_x].adj_tiles = self.find_adj(adj_x, adj_y)
+        if was_wall == is_wall or self._passable is None:
+            return
+
+        i = y * len(self.tiles[0]) + x
+        self._passable[i] = 0 if is_wall else 1
+        for derived in (self._path_query, self._components):
+            if derived is None:
+                continue
+            if is_wall:
+                derived.cell_closed(i)
+            else:
+                derived.cell_opened(i)
+
+    def distance(self, source: Tile, target: Tile) -> int:
+        '''
+        Return the number of moves on a shortest route from source to target,
+        or None if target can not be reached from source.
+        '''
+        return self.path_query().distance((source.x, source.y), (target.x, target.y))
+
     def find_adj(self, x: int, y: int) -> list:
         '''
         Return a list of non-wall Tile objects which are adjacent (to the north,
@@ -136,7 +346,7 @@ class Map:
                 pass
             elif newX >= len(self.tiles[0]) or newY >= len(self.tiles):
                 pass
-            elif self.tiles[newY][newX].desc in GEMS + ["dirt"]:
+            elif self.tiles[newY][newX].desc in WALKABLE:
                 adj.append(self.tiles[newY][newX])
 
         return adj
@@ -153,17 +363,36 @@ class Map:
             s += "\n"
         return s
 
+def load_map(path: str) -> list:
+    '''
+    Return the map data stored in the text file at path, written the same
+    way a Map prints itself: one row per line, three characters per tile.
+    '''
+    map_data = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                map_data.append([line[i:i+3] for i in range(0, len(line), 3)])
+    return map_data
+
 class DrillBot:
 
-    def __init__(self, m):
+    def __init__(self, m, headless: bool = False):
         '''Given a map, puts the DrillBot on the map and assigns it an icon
         according to the id_num. Creates a storage and list of everyone
-        previously visited by the DrillBot.
+        previously visited by the DrillBot, and keeps count of the distance
+        (number of moves) travelled. A headless DrillBot explores without
+        printing the map or pausing between moves.
         '''
         self.id_num = 0
         self.storage = {}
         self.visited = []
         self.map = m
+        self.headless = headless
+        self.observers = [] # callables given each printed map, e.g. a spectator broadcaster
+        self.distance = 0
+        self._seen = set()
 
     def visit(self, location: Tile):
         '''Given a location, moves the DrillBot to it and adds any
@@ -171,33 +400,118 @@ class DrillBot:
         '''
         dug = location.desc #checks desc of tile
         location.get_visited(self.id_num) #moves drillbot to location
-        print(self.map) #prints map
+        self.show()
         if dug in GEMS: #if the tile has a gem
             self.storage[dug] = self.storage.get(dug, 0) + 1 #updates storage
         location.get_dug() #updates map with dirt
         self.visited.append(location) #adds which tile was visited
-        time.sleep(0.5) #changes time
-        
+        self._seen.add(location)
+        if not self.headless:
+            time.sleep(0.5) #changes time
+
+    def show(self):
+        '''Prints the map (unless headless) and passes it on to every observer.'''
+        if self.headless and not self.observers:
+            return
+        s = repr(self.map)
+        if not self.headless:
+            print(s) #prints map
+        for observer in self.observers:
+            observer(s)
+
+    def _nearest_unfinished(self, location: Tile) -> list:
+        '''Return a shortest path from location to the closest visited tile
+        that still has an unvisited neighbour, or None if every reachable
+        tile has been visited.
+        '''
+        parents = {location: None}
+        queue = deque([location])
+        while queue:
+            tile = queue.popleft()
+            for adj in tile.adj_tiles:
+                if adj not in self._seen:
+                    path = [tile]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    path.reverse()
+                    return path
+            for adj in tile.adj_tiles:
+                if adj not in parents:
+                    parents[adj] = tile
+                    queue.append(adj)
+        return None
+
     def explore(self, location: Tile):
         '''Given a location, checks the adjacent tiles to possibly visit.
-        Once all the tiles on the map have been visited, returns to the
-        starting location and tallies up all gems collected.
+        At a dead end, jumps along the shortest path back to the nearest
+        tile that still has unvisited neighbours. Once all the tiles on the
+        map have been visited, returns to the starting location along a
+        shortest path and tallies up all gems collected.
         '''
         self.visit(location)
-        togo = self.map.find_adj(location.x, location.y)
-        togo.reverse()
-        num_moves = 0
-        for tile in togo:
-            if tile not in self.visited:
-                num_moves += 1
-                self.explore(tile)
-        if num_moves == 0:
-            currIndex = self.visited.index(location)
-            if currIndex == 0:
-                return
-            self.explore(self.visited[currIndex-1])
-                
-        
+        while True:
+            togo = self.map.find_adj(location.x, location.y)
+            togo.reverse()
+            next_tile = None
+            for tile in togo:
+                if tile not in self._seen:
+                    next_tile = tile
+                    break
+            if next_tile is None:
+                path = self._nearest_unfinished(location)
+                if path is None:
+                    break
+                self.distance += len(path) - 1 #jumps back over visited tiles
+                location = path[-1]
+                continue
+            self.distance += 1
+            location = next_tile
+            self.visit(location)
+        self.return_home(location)
+
+    def explore_unknown(self, location: Tile) -> list:
+        '''Given a location, explores the map as if the DrillBot could only
+        sense the tiles next to it, heading for the nearest tile it has seen
+        but not visited (see frontier.explore_unknown), then returns to
+        location. Returns (moves, tiles revealed) pairs showing how the map
+        was uncovered.
+        '''
+        return frontier.explore_unknown(self, location)
+
+    def harvest(self, budget: int, values: dict = None, time_limit: float = 1.0) -> int:
+        '''Given a move budget and what each kind of gem is worth, plans a
+        route from the map's starting point (see harvest.plan_harvest) and
+        drives it, collecting the planned gems (and any others passed on the
+        way) before returning to the start within budget moves. Returns the
+        value of the gems collected.
+        '''
+        route, _ = plan_harvest(self.map, budget, values, time_limit)
+        location = self.map.start
+        self.visit(location)
+        for target in route + [self.map.start]:
+            path = self.map.shortest_path(location, target)
+            for tile in path[1:]:
+                self.distance += 1
+                self.visit(tile)
+            location = target
+        values = GEM_VALUES if values is None else values
+        return sum(values.get(gem, 0) * count for gem, count in self.storage.items())
+
+    def return_home(self, location: Tile):
+        '''Given the DrillBot's current location, moves it back to the
+        map's starting point along a shortest path.
+        '''
+        path = self.map.shortest_path(location, self.map.start)
+        if path is None:
+            return
+        self.distance += len(path) - 1
+        if not self.headless or self.observers:
+            start = self.map.start
+            start.get_visited(self.id_num)
+            self.show()
+            start.get_dug()
+
+
 if __name__ == "__main__":
     # Some set worlds; feel free to add more maps to test things out
     map1 = [['(_)','(_)','(s)'],
@@ -224,3 +538,4 @@ if __name__ == "__main__":
     d.explore(m.start)
     print('and this is what the drillbot managed to mine')
     print(d.storage)
+    print('it travelled a total distance of', d.distance, 'moves')
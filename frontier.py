@@ -0,0 +1,235 @@
+import heapq
+from array import array
+from collections import deque
+
+from pathquery import UNREACHED
+
+UNKNOWN = 0
+FREE = 1
+WALL = 2
+
+HORIZON = 8 # how far from the frontier BeliefMap.to_frontier keeps distances
+
+
+class BeliefMap:
+    '''
+    What a DrillBot has found out about a mine it can not see: for every
+    position, whether it is still UNKNOWN, known to be FREE to move onto, or
+    known to be a WALL. The frontier is the set of FREE positions the bot
+    has seen but not yet stood on.
+
+    to_frontier holds, for every known FREE position within horizon moves
+    of the frontier, how many moves it is from the nearest frontier
+    position (UNREACHED elsewhere). It is kept up to date incrementally as
+    positions are sensed: new frontier positions only lower the distances
+    around them, and a frontier position the bot stands on only raises the
+    distances of the positions whose nearest frontier it was, which are
+    found and repaired outwards from it. The horizon bounds that repair,
+    as every position behind the bot is farther from the frontier after
+    each step it takes into the unknown.
+    '''
+
+    def __init__(self, width: int, height: int, horizon: int = HORIZON) -> None:
+        '''
+        Construct a BeliefMap of width x height where nothing is known,
+        keeping distances to the frontier up to horizon moves.
+        '''
+        self.width = width
+        self.height = height
+        self.horizon = horizon
+        self.cells = bytearray(width * height)
+        self.visited = bytearray(width * height)
+        self.frontier = set()
+        self.to_frontier = array('i', [UNREACHED]) * (width * height)
+        self.revealed = 0
+
+    def sense(self, m, x: int, y: int) -> None:
+        '''
+        Record what a bot standing at (x, y) on the real map m can sense:
+        its own spot and the four spots next to it.
+        '''
+        w = self.width
+        i = y * w + x
+        self.visited[i] = 1
+        was_frontier = i in self.frontier
+        self.frontier.discard(i)
+        opened = []
+        for nx, ny in ((x, y), (x, y + 1), (x + 1, y), (x, y - 1), (x - 1, y)):
+            if 0 <= nx < w and 0 <= ny < self.height:
+                j = ny * w + nx
+                if self.cells[j] == UNKNOWN:
+                    self.revealed += 1
+                    if m.tiles[ny][nx].desc == 'wall':
+                        self.cells[j] = WALL
+                    else:
+                        self.cells[j] = FREE
+                        opened.append(j)
+                        if not self.visited[j]:
+                            self.frontier.add(j)
+        self._lower(opened)
+        if was_frontier:
+            self._raise(i)
+
+    def _lower(self, opened: list) -> None:
+        '''
+        Update to_frontier after the flat indexes in opened have become
+        known FREE positions, spreading out only as far as distances drop.
+        '''
+        dist, horizon = self.to_frontier, self.horizon
+        heap = []
+        for i in opened:
+            if i in self.frontier:
+                dist[i] = 0
+            else:
+                for p in self.free_neighbours(i):
+                    if dist[p] != UNREACHED and dist[p] < horizon and \
+                       (dist[i] == UNREACHED or dist[p] + 1 < dist[i]):
+                        dist[i] = dist[p] + 1
+            if dist[i] != UNREACHED:
+                heap.append((dist[i], i))
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u] or d == horizon:
+                continue
+            for v in self.free_neighbours(u):
+                if dist[v] == UNREACHED or dist[v] > d + 1:
+                    dist[v] = d + 1
+                    heapq.heappush(heap, (d + 1, v))
+
+    def _raise(self, i: int) -> None:
+        '''
+        Update to_frontier after flat index i has left the frontier. Only
+        positions whose every shortest route to the frontier ended at i can
+        get farther away; those are found level by level outwards from i,
+        then given new distances from the unaffected positions around them.
+        '''
+        dist, horizon = self.to_frontier, self.horizon
+        affected = {i}
+        queue = deque([i])
+        while queue:
+            u = queue.popleft()
+            for v in self.free_neighbours(u):
+                if v not in affected and dist[v] == dist[u] + 1 and \
+                   not any(dist[p] == dist[v] - 1 and p not in affected
+                           for p in self.free_neighbours(v)):
+                    affected.add(v)
+                    queue.append(v)
+        for v in affected:
+            dist[v] = UNREACHED
+        heap = []
+        for v in affected:
+            for p in self.free_neighbours(v):
+                if p not in affected and dist[p] != UNREACHED and dist[p] < horizon and \
+                   (dist[v] == UNREACHED or dist[p] + 1 < dist[v]):
+                    dist[v] = dist[p] + 1
+            if dist[v] != UNREACHED:
+                heap.append((dist[v], v))
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u] or d == horizon:
+                continue
+            for v in self.free_neighbours(u):
+                if v in affected and (dist[v] == UNREACHED or dist[v] > d + 1):
+                    dist[v] = d + 1
+                    heapq.heappush(heap, (d + 1, v))
+
+    def free_neighbours(self, i: int) -> list:
+        '''Return the flat indexes of known FREE positions next to flat index i.'''
+        w, cells = self.width, self.cells
+        x = i % w
+        adj = []
+        if i + w < len(cells) and cells[i + w] == FREE:
+            adj.append(i + w)
+        if x + 1 < w and cells[i + 1] == FREE:
+            adj.append(i + 1)
+        if i >= w and cells[i - w] == FREE:
+            adj.append(i - w)
+        if x > 0 and cells[i - 1] == FREE:
+            adj.append(i - 1)
+        return adj
+
+    def path_to_frontier(self, source: int) -> list:
+        '''
+        Return a shortest list of flat indexes through known FREE positions
+        from source (excluded) to the nearest frontier position, or None if
+        no frontier position can be reached. Within the horizon this only
+        walks down to_frontier; farther away it falls back to a BFS.
+        '''
+        dist = self.to_frontier
+        if dist[source] == UNREACHED:
+            return self.path_to(source, self.frontier.__contains__)
+        path = []
+        i = source
+        while dist[i] != 0:
+            i = next(j for j in self.free_neighbours(i) if dist[j] == dist[i] - 1)
+            path.append(i)
+        return path
+
+    def path_to(self, source: int, goal) -> list:
+        '''
+        Return a shortest list of flat indexes through known FREE positions
+        from source to the nearest position for which goal(i) is true
+        (source excluded), or None if there is none.
+        '''
+        parents = {source: None}
+        queue = deque([source])
+        while queue:
+            i = queue.popleft()
+            if i != source and goal(i):
+                path = [i]
+                while parents[path[-1]] != source:
+                    path.append(parents[path[-1]])
+                path.reverse()
+                return path
+            for j in self.free_neighbours(i):
+                if j not in parents:
+                    parents[j] = i
+                    queue.append(j)
+        return None
+
+
+def explore_unknown(bot, location) -> list:
+    '''
+    Explore bot's map starting from the Tile location as if the bot could
+    only sense the spots right next to it. The bot always travels to the
+    nearest frontier position through spots it already knows are free (a
+    neighbouring one, if there is any), then returns to location once the
+    frontier is empty.
+
+    The way to the nearest frontier position is read off the belief map's
+    to_frontier distances, which are updated incrementally as each move
+    reveals the mine, so finding it costs only the length of the way. Only
+    a dead end more than HORIZON moves from the frontier needs a BFS, which
+    stops at the first frontier position it reaches. The price is a repair
+    of to_frontier after every move, up to HORIZON positions deep.
+
+    Return a list of (moves, revealed) pairs, one for each move that
+    revealed something new, tracking how many positions were known
+    after how many moves.
+    '''
+    m = bot.map
+    belief = BeliefMap(len(m.tiles[0]), len(m.tiles))
+    w = belief.width
+    here = location.y * w + location.x
+    start = here
+    bot.visit(location)
+    belief.sense(m, location.x, location.y)
+    progress = [(bot.distance, belief.revealed)]
+
+    while belief.frontier:
+        step = belief.path_to_frontier(here)
+        for i in step:
+            bot.distance += 1
+            here = i
+        x, y = here % w, here // w
+        bot.visit(m.tiles[y][x])
+        known = belief.revealed
+        belief.sense(m, x, y)
+        if belief.revealed != known:
+            progress.append((bot.distance, belief.revealed))
+
+    if here != start:
+        bot.distance += len(belief.path_to(here, lambda i: i == start))
+    return progress
@@ -0,0 +1,139 @@
+import time
+from array import array
+from collections import deque
+
+from pathquery import UNREACHED, bfs, neighbours
+
+GEM_VALUES = {'ruby': 1, 'sapphire': 2, 'emerald': 3, 'diamond': 5}
+
+
+def plan_harvest(m, budget: int, values: dict = None, time_limit: float = 1.0,
+                 beam_width: int = 64, branching: int = 16) -> tuple:
+    '''
+    Plan which gems a DrillBot starting on m.start should collect, and in
+    what order, so it can bring back as much value as possible without
+    making more than budget moves in total (including the trip back to
+    m.start). values gives what each kind of gem is worth (GEM_VALUES by
+    default).
+
+    A beam search extends the best beam_width partial routes one gem at a
+    time, trying the branching uncollected gems nearest each route's last
+    gem, and keeps only extensions that still leave enough budget to get
+    home. The nearest gems come from a BFS that stops as soon as it has
+    found branching gems the route has not collected yet; the gems it
+    passed on the way are remembered, so the BFS is only run again once a
+    route has collected too many of them. Only when none of the nearest
+    gems fit is a full BFS run to try every other gem.
+
+    The time_limit seconds cover the whole call. First a BFS from m.start
+    finds how far each gem is from home, going no further than budget // 2
+    moves; if it has not finished in half the time, only the gems it has
+    reached so far are considered. A greedy route that always goes to the
+    nearest uncollected gem is then planned, and the beam search runs in
+    whatever time is left until no route can be extended. Every partial
+    route is a valid way home, so when time runs out the best one found
+    so far is returned.
+
+    Return (route, value): the list of gem Tiles in the order to collect
+    them, and their total value.
+    '''
+    deadline = time.perf_counter() + time_limit
+    values = GEM_VALUES if values is None else values
+    passable = m.passable()
+    w = len(m.tiles[0])
+
+    start = m.start.y * w + m.start.x
+    from_start = bfs(passable, w, start, deadline - time_limit / 2, budget // 2, partial=True)
+    gems = [t for row in m.tiles for t in row
+            if values.get(t.desc, 0) > 0 and from_start[t.y * w + t.x] != UNREACHED]
+    points = [start] + [t.y * w + t.x for t in gems] # point 0 is home, point i is gems[i-1]
+    worth = [0] + [values[t.desc] for t in gems]
+
+    home = array('i', (from_start[p] for p in points)) # moves from each point to home
+    point_at = {p: i for i, p in enumerate(points) if i != 0}
+    near_cache = {} # point -> (gems in BFS order, whether the BFS covered every cell)
+    far_cache = {}
+
+    def near(i, mask, count):
+        '''
+        Return [(moves, j), ...] for the gems nearest point i, in order of
+        distance, far enough out to hold count gems not in mask (or every
+        gem that can be reached, if there are fewer).
+        '''
+        if i in near_cache:
+            found, complete = near_cache[i]
+            if complete or sum(not mask >> j & 1 for _, j in found) >= count:
+                return found
+        found = []
+        wanted = count
+        seen = {points[i]: 0}
+        queue = deque([points[i]])
+        popped = 0
+        while queue and wanted > 0:
+            cell = queue.popleft()
+            popped += 1
+            if popped % 4096 == 0 and time.perf_counter() >= deadline:
+                return found
+            d = seen[cell] + 1
+            for adj in neighbours(passable, w, cell):
+                if adj not in seen:
+                    seen[adj] = d
+                    queue.append(adj)
+                    j = point_at.get(adj)
+                    if j is not None:
+                        found.append((d, j))
+                        wanted -= not mask >> j & 1
+        near_cache[i] = found, not queue
+        return found
+
+    def far(i, mask, count):
+        '''
+        Return [(moves, j), ...] for every gem, measured from point i, or
+        [] if deadline passes before the BFS is done.
+        '''
+        if i not in far_cache:
+            # no route standing on point i has more than this many moves left to spend
+            field = from_start if i == 0 else bfs(passable, w, points[i], deadline, budget - home[i])
+            if field is None:
+                return []
+            far_cache[i] = [(field[points[j]], j) for j in range(1, len(points))
+                            if field[points[j]] != UNREACHED]
+        return far_cache[i]
+
+    def search(width, count):
+        '''
+        Return the best (value, route of point numbers) a beam of the given
+        width finds before the deadline, trying the count uncollected gems
+        nearest the end of each route.
+        '''
+        best_value, best_route = 0, ()
+        beam = [(0, 0, 0, 0, ())] # (value, moves used, current point, collected bitmask, route)
+        while beam and time.perf_counter() < deadline:
+            extended = []
+            for value, used, here, mask, route in beam:
+                for candidates in (near, far):
+                    found = False
+                    for d, j in candidates(here, mask, count):
+                        if mask >> j & 1:
+                            continue
+                        moves = used + d
+                        if moves + home[j] <= budget:
+                            extended.append((value + worth[j], moves, j, mask | 1 << j, route + (j,)))
+                            found = True
+                    # only look past the nearest gems when none of them fit
+                    if found:
+                        break
+                if time.perf_counter() >= deadline:
+                    break
+            extended.sort(key=lambda state: (-state[0], state[1]))
+            beam = extended[:width]
+            if beam and beam[0][0] > best_value:
+                best_value, best_route = beam[0][0], beam[0][4]
+        return best_value, best_route
+
+    best_value, best_route = search(1, 1)
+    value, route = search(beam_width, branching)
+    if value > best_value:
+        best_value, best_route = value, route
+
+    return [gems[j - 1] for j in best_route], best_value
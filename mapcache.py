@@ -0,0 +1,170 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+
+from connectivity import Components
+from pathquery import PathQuery
+
+FORMAT = 2 # bump when the layout of a cache entry changes
+
+# which of a tile's neighbours are walkable, one bit each, in the order Map.find_adj lists them
+SOUTH, EAST, NORTH, WEST = 1, 2, 4, 8
+
+
+def map_key(map_data: list) -> str:
+    '''
+    Return a hex digest identifying the contents of the given map data (a
+    list of lists of icons), used to name its cache entry.
+    '''
+    digest = hashlib.sha256('format {} {}x{}\n'.format(
+        FORMAT, len(map_data[0]), len(map_data)).encode())
+    for row in map_data:
+        digest.update(''.join(row).encode())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def adjacency_masks(passable, width: int) -> bytearray:
+    '''
+    Return a bytearray holding, for every cell of a grid of the given
+    width stored flat in passable, the SOUTH/EAST/NORTH/WEST bits of its
+    passable neighbours.
+    '''
+    size = len(passable)
+    masks = bytearray(size)
+    for i in range(size):
+        x = i % width
+        mask = 0
+        if i + width < size and passable[i + width]:
+            mask |= SOUTH
+        if x + 1 < width and passable[i + 1]:
+            mask |= EAST
+        if i >= width and passable[i - width]:
+            mask |= NORTH
+        if x > 0 and passable[i - 1]:
+            mask |= WEST
+        masks[i] = mask
+    return masks
+
+
+def _map_file(path: str, fmt: str):
+    '''
+    Return a writable view of the file at path, memory-mapped copy-on-write
+    so later changes (e.g. Map.add_wall) never reach the cached file.
+    '''
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    return memoryview(mm).cast(fmt)
+
+
+class MapCache:
+    '''
+    A directory of indexes derived from maps (which tiles are walkable,
+    which neighbours each tile is linked to, component labels and landmark
+    distance fields), each entry named by the hash of the map's contents.
+    Entries are raw arrays on disk that are memory-mapped when loaded.
+
+    What a hit saves is building those indexes: the landmark BFSes and the
+    component labelling, which take a few times as long as creating the
+    Map itself, and the neighbour checks of Map._connect_tiles. Creating
+    the Tiles and their adj_tiles lists is not saved, so a Map opened from
+    the cache takes about as long as a plain Map(); the gain is for callers
+    of Map.path_query() and Map.components(), which then answer at once.
+    An entry takes about 22 bytes per tile, so the default limit of 8 GiB
+    holds a few 10**8-tile mines. When the directory grows past max_bytes,
+    the least recently used entries are deleted; an entry bigger than
+    max_bytes on its own is never stored.
+    '''
+
+    def __init__(self, directory: str, max_bytes: int = 8 << 30) -> None:
+        '''Use (and create if needed) directory, holding at most max_bytes.'''
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        '''Return the directory holding the entry for key.'''
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str, width: int, height: int):
+        '''
+        Return (adjacency masks, PathQuery, Components) for the map with the
+        given key, or None if it is not cached. An entry that can not be
+        read in full is deleted, so the next store() can replace it.
+        '''
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            with open(os.path.join(entry, 'meta.json')) as f:
+                meta = json.load(f)
+            passable = _map_file(os.path.join(entry, 'passable.bin'), 'B')
+            masks = _map_file(os.path.join(entry, 'adjacency.bin'), 'B')
+            labels = _map_file(os.path.join(entry, 'labels.bin'), 'i')
+            dists = [_map_file(os.path.join(entry, 'landmark{}.bin'.format(k)), 'i')
+                     for k in range(len(meta['landmarks']))]
+            sizes = {int(label): size for label, size in meta['sizes'].items()}
+            if any(len(a) != width * height for a in [passable, masks, labels] + dists):
+                raise ValueError('truncated cache entry')
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        os.utime(entry) # mark as recently used for eviction
+        return (masks, PathQuery.restore(passable, width, height, meta['landmarks'], dists),
+                Components.restore(passable, width, labels, sizes))
+
+    def store(self, key: str, masks, query: PathQuery, components: Components) -> None:
+        '''
+        Save the indexes of the map with the given key, then evict old
+        entries (never this one) if the cache is over its size limit.
+        Nothing is saved if the entry alone would not fit.
+        '''
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        size = len(masks) * (2 + 4 * (1 + len(query.landmark_dists)))
+        if size > self.max_bytes:
+            return
+        # write to a temporary directory and rename it, so readers never see half an entry
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        with open(os.path.join(tmp, 'passable.bin'), 'wb') as f:
+            f.write(bytes(query.passable))
+        with open(os.path.join(tmp, 'adjacency.bin'), 'wb') as f:
+            f.write(bytes(masks))
+        with open(os.path.join(tmp, 'labels.bin'), 'wb') as f:
+            f.write(bytes(components.labels))
+        for k, dist in enumerate(query.landmark_dists):
+            with open(os.path.join(tmp, 'landmark{}.bin'.format(k)), 'wb') as f:
+                f.write(bytes(dist))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'landmarks': query.landmarks, 'sizes': components.sizes}, f)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True) # another process stored it first
+        self.evict(keep=key)
+
+    def evict(self, keep: str = None) -> None:
+        '''
+        Delete least recently used entries until the cache fits in
+        max_bytes, sparing the entry for the key keep.
+        '''
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            total += size
+            if name != keep:
+                entries.append((os.path.getmtime(path), size, path))
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -1,17 +1,20 @@
 import random
 from stack import Stack #PUT STACK ELEMENT IN GET NEW POSITION
+from board import Board, EMPTY, PLAYER, GOLD
+from maze_solver import MazeSolver
 
 class MazeGame:
     '''
     A game where a player moves through a grid to reach some treasure.
     '''
 
-    def __init__(self, width, height, player):
+    def __init__(self, width, height, player, board=None):
         '''
-        (MazeGame, Player) -> None
+        (MazeGame, Player, Board) -> None
         Construct a new MazeGame with the given width and height,
         and a player. MazeGame should also place a "gold" at
         a randomly chosen coordinate on the far edge of the grid.
+        If a board is given it is reset and reused for this game.
         '''
         
         self.width = width
@@ -20,24 +23,22 @@ class MazeGame:
         # place the gold at a random spot on the far edge of the grid
         self.gold_coord = (width-1, random.randint(1, height-1)) 
 
-        self.grid = []
+        self.board = board if board is not None else Board()
+        self.observers = [] # callables given each printed frame, e.g. a spectator broadcaster
         self.make_grid()
         self.stack = Stack() #sets the stack to be accesible
+        self.solver = None # built the first time the player asks for a hint
         
     def make_grid(self):
         '''
         (MazeGame) -> None
         Given width, height and positions of player and gold,
-        append things to this maze's grid.
+        reset this maze's board and place them on it.
         '''
         
-        for i in range(self.height):
-            self.grid.append([])
-            for j in range(self.width):
-                self.grid[i].append('(_)') 
-        
-        self.grid[self.player.y][self.player.x] = '(x)'
-        self.grid[self.gold_coord[1]][self.gold_coord[0]] = '(*)'
+        self.board.reset(self.width, self.height)
+        self.board.set(self.player.x, self.player.y, PLAYER)
+        self.board.set(self.gold_coord[0], self.gold_coord[1], GOLD)
 
     
     def play_game(self):
@@ -48,8 +49,7 @@ class MazeGame:
         '''
         
         # print out the starting state of the maze
-        print(self)
-        print('------------')
+        self.show()
         
         while (not (self.player.x, self.player.y) == \
                (self.gold_coord[0], self.gold_coord[1])):
@@ -87,23 +87,27 @@ class MazeGame:
         # keep track of the Player's current position before they move
         old_x, old_y = self.player.x, self.player.y 
         self.player.move(new_position)
-        self.grid[self.player.y][self.player.x] = self.grid[old_y][old_x]
-        self.grid[old_y][old_x] = '(_)'
+        self.board.move((old_x, old_y), (self.player.x, self.player.y))
 
         self.stack.push((old_y, old_x))
         
-    def play_one_turn(self):
+    def play_one_turn(self, direction=None):
         '''
-        (MazeGame) -> None
+        (MazeGame, str) -> None
         Play one turn of the game. Turn could involve moving one place,
-        attempting to move one place, or undoing the most recent move.
+        attempting to move one place, undoing the most recent move, or
+        asking for a hint.
+        If no direction is given, ask the player for one.
         '''
 
         # get the direction the Player wants to move
-        direction = self.player.get_direction() 
+        if direction is None:
+            direction = self.player.get_direction() 
 
         if (direction == 'U'):
             self.undo_last_move()
+        elif (direction == 'H'):
+            self.give_hint()
         else:
             # this returns None if move is not valid
             new_position = self.get_new_position(direction) 
@@ -115,8 +119,19 @@ class MazeGame:
                 print("Player {} attempted to move {}. Way is blocked.".format(self.player.name, direction))
 
         # print current state of game
-        print(self)
-        print('------------')
+        self.show()
+
+    def give_hint(self):
+        '''
+        (MazeGame) -> None
+        Print the best next move for the player and how many moves it will
+        take them to reach the gold from here.
+        '''
+        if self.solver is None:
+            self.solver = MazeSolver.from_game(self)
+        move = self.solver.best_move(self.player.x, self.player.y)
+        remaining = self.solver.moves_remaining(self.player.x, self.player.y)
+        print("Hint: go {}. The gold is {} moves away.".format(move, remaining))
 
     def undo_last_move(self):
         '''
@@ -128,20 +143,45 @@ class MazeGame:
             print("Invalid. There was no past move.")
         else:
             last_move = self.stack.pop()
-            self.grid[self.player.y][self.player.x] = "(_)"
+            self.board.set(self.player.x, self.player.y, EMPTY)
             self.player.y = last_move[0]
             self.player.x = last_move[1]
-            self.grid[last_move[0]][last_move[1]] = '(x)'
+            self.board.set(last_move[1], last_move[0], PLAYER)
     
+    def is_over(self):
+        '''
+        (MazeGame) -> bool
+        Return whether the player has reached the gold.
+        '''
+        return (self.player.x, self.player.y) == self.gold_coord
+
+    def tick(self, key):
+        '''
+        (MazeGame, str or None) -> None
+        Advance a real-time game by one tick: play a turn if the player has
+        pressed a direction (or U or H) since the last tick.
+        '''
+        if key is not None and key in "NSEWUH":
+            self.play_one_turn(key)
+
+    def show(self):
+        '''
+        (MazeGame) -> None
+        Print the current state of the game, and pass the same text to
+        every observer watching this game.
+        '''
+        s = str(self)
+        print(s)
+        print('------------')
+        for observer in self.observers:
+            observer(s)
+
     def __str__(self):
         '''
         (MazeGame) -> str
         Return string representation of the game's grid.
         '''
-        s = ''
-        for row in self.grid:
-            s += ''.join(row) + "\n"
-        return s.strip()
+        return str(self.board)
 
 
 class Player:
@@ -154,10 +194,10 @@ class Player:
 
     def get_direction(self):
         '''Supposed to output a string'''
-        direction = input("Which direction do you want to go? U for undo: ")
-        while direction.lower() not in "nwesu":
-            direction = input("Error. Input new direction or undo: ")
-        if direction.lower() in "nwesu":
+        direction = input("Which direction do you want to go? U for undo, H for a hint: ")
+        while direction.lower() not in "nwesuh":
+            direction = input("Error. Input new direction, undo or hint: ")
+        if direction.lower() in "nwesuh":
             direction = direction.upper()
         return direction
 
@@ -174,10 +214,11 @@ def main():
 
     name = input("What is your name? ")
     p1 = Player(name, 0, 0) # make a player at position (0,0)
+    board = Board() # reused by every round
     
     play_again = True
     while play_again:
-        g = MazeGame(width, height, p1)
+        g = MazeGame(width, height, p1, board)
         g.play_game()
         # reset player locations at end of round
         p1.move((0,0))
@@ -1,4 +1,5 @@
 import random
+from board import Board, PLAYER, RIVAL, GOLD
 
 class MazeGame:
     '''
@@ -6,12 +7,13 @@ class MazeGame:
     be the first to reach some treasure.
     '''
 
-    def __init__(self, width, height, player1, player2):
+    def __init__(self, width, height, player1, player2, board=None):
         '''
-        (MazeGame, Player, Player) -> None
+        (MazeGame, Player, Player, Board) -> None
         Construct a new MazeGame with the given width and height,
         and two players. MazeGame should also place a "gold" at
         a randomly chosen coordinate on the far edge of the grid.
+        If a board is given it is reset and reused for this game.
         '''
         
         self.width = width
@@ -20,7 +22,8 @@ class MazeGame:
         # place the gold at a random spot on the far edge of the grid
         self.gold_coord = (width-1, random.randint(1, height-1)) 
 
-        self.grid = []
+        self.board = board if board is not None else Board()
+        self.observers = [] # callables given each printed frame, e.g. a spectator broadcaster
         self.make_grid()
 
         self.turn = 0 # keep track of whose turn it is out of the two players
@@ -29,17 +32,13 @@ class MazeGame:
         '''
         (MazeGame) -> None
         Given width, height and positions of player and gold,
-        append things to this maze's grid.
+        reset this maze's board and place them on it.
         '''
         
-        for i in range(self.height):
-            self.grid.append([])
-            for j in range(self.width):
-                self.grid[i].append('(_)') 
-        
-        self.grid[self.players[0].y][self.players[0].x] = '(x)'
-        self.grid[self.players[1].y][self.players[1].x] = '(o)'
-        self.grid[self.gold_coord[1]][self.gold_coord[0]] = '(*)'
+        self.board.reset(self.width, self.height)
+        self.board.set(self.players[0].x, self.players[0].y, PLAYER)
+        self.board.set(self.players[1].x, self.players[1].y, RIVAL)
+        self.board.set(self.gold_coord[0], self.gold_coord[1], GOLD)
 
     def whose_turn(self, count):
         '''
@@ -60,8 +59,7 @@ class MazeGame:
         '''
         
         # print out the starting state of the maze
-        print(self)
-        print('------------')
+        self.show()
         
         winner = None
         while (not winner):
@@ -108,19 +106,20 @@ class MazeGame:
         # keep track of the Player's current position before they move
         old_x, old_y = player.x, player.y 
         player.move(new_position)
-        self.grid[player.y][player.x] = self.grid[old_y][old_x]
-        self.grid[old_y][old_x] = '(_)'
+        self.board.move((old_x, old_y), (player.x, player.y))
         
-    def play_one_turn(self):
+    def play_one_turn(self, direction=None):
         '''
-        (MazeGame) -> None
+        (MazeGame, str) -> None
         Play one turn of the game. Turn could involve moving one place,
         attempting to move one place, or undoing the most recent move.
+        If no direction is given, ask the current player for one.
         '''
         
         current_player = self.whose_turn(self.turn) # get the Player whose turn it currently is
         other_player = self.whose_turn(self.turn-1) # get the other Player in the game
-        direction = current_player.get_direction() # get the direction the Player wants to move
+        if direction is None:
+            direction = current_player.get_direction() # get the direction the Player wants to move
 
         # this returns None if move is not valid
         new_position = self.get_new_position(current_player, other_player, direction) 
@@ -132,20 +131,48 @@ class MazeGame:
             print("Player {} attempted to move {}. Way is blocked.".format(current_player.name, direction))
 
         # print current state of game
-        print(self)
-        print('------------')
+        self.show()
         
         self.turn += 1
     
+    def is_over(self):
+        '''
+        (MazeGame) -> bool
+        Return whether either player has reached the gold.
+        '''
+        return any((p.x, p.y) == self.gold_coord for p in self.players)
+
+    def tick(self, key):
+        '''
+        (MazeGame, str or None) -> None
+        Advance a real-time game by one tick: a computer player whose turn
+        it is moves straight away, and a user player moves once they have
+        pressed a direction since the last tick.
+        '''
+        current_player = self.whose_turn(self.turn)
+        if isinstance(current_player, ComputerPlayer):
+            self.play_one_turn()
+        elif key is not None and key in "NSEW":
+            self.play_one_turn(key)
+
+    def show(self):
+        '''
+        (MazeGame) -> None
+        Print the current state of the game, and pass the same text to
+        every observer watching this game.
+        '''
+        s = str(self)
+        print(s)
+        print('------------')
+        for observer in self.observers:
+            observer(s)
+
     def __str__(self):
         '''
         (MazeGame) -> str
         Return string representation of the game's grid.
         '''
-        s = ''
-        for row in self.grid:
-            s += ''.join(row) + "\n"
-        return s.strip()
+        return str(self.board)
 
 
 class Player:
@@ -238,10 +265,11 @@ def main():
     name = input("What is p2's name? ")
     # make the second player either a User or Computer based on response to prompt, at position (0,1)
     p2 = make_player(name, player_type.lower(), 0, 1) 
+    board = Board() # reused by every round
 
     play_again = True
     while play_again:
-        g = MazeGame(width, height, p1, p2)
+        g = MazeGame(width, height, p1, p2, board)
         g.play_game()
         # reset player locations at end of round
         p1.move((0,0))
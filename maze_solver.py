@@ -0,0 +1,97 @@
+from array import array
+from collections import deque
+
+DIRECTIONS = (("N", 0, -1), ("S", 0, 1), ("E", 1, 0), ("W", -1, 0))
+
+
+class MazeSolver:
+    '''
+    Knows the optimal play for one maze board. A breadth-first search run
+    backwards from the gold once, when the solver is built, records how many
+    moves every cell is from the gold, in a flat array of the smallest
+    unsigned integer type that fits the board. After that, "how many moves
+    are left" and "which move is best" are answered by looking at a cell and
+    its four neighbours, from wherever the player is (including after an undo).
+    '''
+
+    def __init__(self, width, height, gold_coord, blocked=()):
+        '''
+        (MazeSolver, int, int, tuple of two ints, iterable of tuples) -> None
+        Build the distance field for a width x height board with the gold at
+        gold_coord. Cells listed in blocked (walls or hazards) are never
+        stepped on.
+        '''
+        self.width = width
+        self.height = height
+        size = width * height
+        self.typecode = 'H' if size < 0xFFFF else 'I'
+        self.unreached = 0xFFFF if self.typecode == 'H' else 0xFFFFFFFF
+        self.dist = array(self.typecode, [self.unreached]) * size
+
+        open_cells = bytearray([1]) * size
+        for x, y in blocked:
+            open_cells[y * width + x] = 0
+
+        gold = gold_coord[1] * width + gold_coord[0]
+        if not open_cells[gold]:
+            return
+        if not blocked:
+            # nothing in the way: every cell is its Manhattan distance from the gold
+            gx, gy = gold_coord
+            row = array(self.typecode, (abs(x - gx) for x in range(width)))
+            for y in range(height):
+                dy = abs(y - gy)
+                self.dist[y * width:(y + 1) * width] = array(self.typecode, (d + dy for d in row))
+            return
+        dist = self.dist
+        dist[gold] = 0
+        frontier = deque([gold])
+        while frontier:
+            i = frontier.popleft()
+            d = dist[i] + 1
+            x = i % width
+            for j in (i - width, i + width):
+                if 0 <= j < size and open_cells[j] and dist[j] == self.unreached:
+                    dist[j] = d
+                    frontier.append(j)
+            if x + 1 < width and open_cells[i + 1] and dist[i + 1] == self.unreached:
+                dist[i + 1] = d
+                frontier.append(i + 1)
+            if x > 0 and open_cells[i - 1] and dist[i - 1] == self.unreached:
+                dist[i - 1] = d
+                frontier.append(i - 1)
+
+    @classmethod
+    def from_game(cls, game, blocked=()):
+        '''
+        (MazeGame, iterable of tuples) -> MazeSolver
+        Build a solver for the given game's board and gold.
+        '''
+        return cls(game.width, game.height, game.gold_coord, blocked)
+
+    def moves_remaining(self, x, y):
+        '''
+        (MazeSolver, int, int) -> int or None
+        Return the fewest moves from (x, y) to the gold, or None if the gold
+        can not be reached from there.
+        '''
+        d = self.dist[y * self.width + x]
+        if d == self.unreached:
+            return None
+        return d
+
+    def best_move(self, x, y):
+        '''
+        (MazeSolver, int, int) -> str or None
+        Return "N", "S", "E" or "W", a move from (x, y) that gets one step
+        closer to the gold, or None if already there or the gold can not be reached.
+        '''
+        d = self.moves_remaining(x, y)
+        if not d:
+            return None
+        for name, dx, dy in DIRECTIONS:
+            new_x, new_y = x + dx, y + dy
+            if (0 <= new_x < self.width) and (0 <= new_y < self.height) and \
+               self.dist[new_y * self.width + new_x] == d - 1:
+                return name
+        return None
@@ -0,0 +1,367 @@
+import heapq
+import time
+from array import array
+from collections import OrderedDict, deque
+
+UNREACHED = -1
+
+
+def neighbours(passable, width: int, i: int) -> list:
+    '''
+    Return the flat indexes of the passable cells north, south, east and
+    west of flat index i, in a grid of the given width stored flat in
+    passable (non-zero meaning the cell can be walked on).
+    '''
+    adj = []
+    if i >= width and passable[i - width]:
+        adj.append(i - width)
+    if i + width < len(passable) and passable[i + width]:
+        adj.append(i + width)
+    x = i % width
+    if x + 1 < width and passable[i + 1]:
+        adj.append(i + 1)
+    if x > 0 and passable[i - 1]:
+        adj.append(i - 1)
+    return adj
+
+
+def bfs(passable, width: int, source: int, deadline: float = None,
+        limit: int = None, partial: bool = False) -> array:
+    '''
+    Return an array holding the distance of every cell from flat index
+    source in a grid of the given width stored flat in passable, with
+    UNREACHED for cells that can not be reached (or, if limit is given,
+    that are more than limit moves away). If time.perf_counter() passes
+    deadline before the search is done, return None instead, or if partial
+    is true the distances found so far (the cells nearest source).
+    '''
+    size = len(passable)
+    dist = array('i', [UNREACHED]) * size
+    if not passable[source]:
+        return dist
+    dist[source] = 0
+    queue = deque([source])
+    popped = 0
+    while queue:
+        i = queue.popleft()
+        popped += 1
+        if deadline is not None and popped % 4096 == 0 and time.perf_counter() >= deadline:
+            return dist if partial else None
+        d = dist[i] + 1
+        if limit is not None and d > limit:
+            break
+        # the same four neighbours as neighbours(), checked inline as this is the hot loop
+        j = i - width
+        if j >= 0 and passable[j] and dist[j] == UNREACHED:
+            dist[j] = d
+            queue.append(j)
+        j = i + width
+        if j < size and passable[j] and dist[j] == UNREACHED:
+            dist[j] = d
+            queue.append(j)
+        x = i % width
+        if x + 1 < width and passable[i + 1] and dist[i + 1] == UNREACHED:
+            dist[i + 1] = d
+            queue.append(i + 1)
+        if x > 0 and passable[i - 1] and dist[i - 1] == UNREACHED:
+            dist[i - 1] = d
+            queue.append(i - 1)
+    return dist
+
+
+class PathQuery:
+    '''
+    A service answering point-to-point distance and path queries on a grid.
+
+    The grid is stored flat: cell (x, y) lives at index y * width + x of a
+    bytearray where non-zero means the cell can be walked on. Queries use A*
+    with ALT (A*, Landmarks, Triangle inequality) lower bounds taken from
+    distance fields precomputed out of a few landmark cells, and recent
+    answers are kept in an LRU cache: distances as plain numbers, and
+    routes (as tuples of flat indexes) only for callers that asked for one.
+    '''
+
+    def __init__(self, passable, width: int, height: int,
+                 num_landmarks: int = 4, cache_size: int = 4096) -> None:
+        '''
+        Construct a PathQuery over the given passable bytearray of a grid of
+        width x height cells, choosing num_landmarks landmarks and remembering
+        up to cache_size recent query results.
+        '''
+        self.passable = passable
+        self.width = width
+        self.height = height
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.landmarks = []
+        self.landmark_dists = []
+        self._choose_landmarks(num_landmarks)
+
+    @classmethod
+    def restore(cls, passable, width: int, height: int, landmarks: list,
+                landmark_dists: list, cache_size: int = 4096) -> 'PathQuery':
+        '''
+        Return a PathQuery using landmarks and their distance fields saved
+        earlier (see mapcache), without running any BFS.
+        '''
+        query = cls(passable, width, height, num_landmarks=0, cache_size=cache_size)
+        query.landmarks = list(landmarks)
+        query.landmark_dists = list(landmark_dists)
+        return query
+
+    def neighbours(self, i: int) -> list:
+        '''
+        Return the flat indexes of the passable cells north, south, east
+        and west of flat index i.
+        '''
+        return neighbours(self.passable, self.width, i)
+
+    def bfs(self, source: int) -> array:
+        '''
+        Return an array holding the distance of every cell from the flat
+        index source, with UNREACHED for cells that can not be reached.
+        '''
+        return bfs(self.passable, self.width, source)
+
+    def _choose_landmarks(self, num_landmarks: int) -> None:
+        '''
+        Pick landmarks by farthest-point selection: each new landmark is the
+        reachable cell farthest from all landmarks chosen so far.
+        '''
+        start = self.passable.find(1) if isinstance(self.passable, bytearray) \
+            else next((i for i, p in enumerate(self.passable) if p), -1)
+        if start == -1 or num_landmarks <= 0:
+            return
+        closest = self.bfs(start)
+        for _ in range(num_landmarks):
+            best, best_d = -1, 0
+            for i, d in enumerate(closest):
+                if d > best_d:
+                    best, best_d = i, d
+            if best == -1:
+                break
+            dist = self.bfs(best)
+            self.landmarks.append(best)
+            self.landmark_dists.append(dist)
+            for i, d in enumerate(dist):
+                if d != UNREACHED and d < closest[i]:
+                    closest[i] = d
+
+    def lower_bound(self, i: int, target: int) -> int:
+        '''
+        Return a lower bound on the distance between flat indexes i and
+        target, or UNREACHED if a landmark proves they are not connected.
+        '''
+        w = self.width
+        bound = abs(i % w - target % w) + abs(i // w - target // w)
+        for dist in self.landmark_dists:
+            di, dt = dist[i], dist[target]
+            if (di == UNREACHED) != (dt == UNREACHED):
+                return UNREACHED
+            if di != UNREACHED and abs(di - dt) > bound:
+                bound = abs(di - dt)
+        return bound
+
+    def _remember(self, key: tuple, value) -> None:
+        '''Store value under key in the LRU cache, evicting the oldest entry.'''
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        '''Forget every cached query result.'''
+        self.cache.clear()
+
+    def cell_opened(self, i: int) -> None:
+        '''
+        Update after flat index i has become passable: landmark distances
+        can only shrink, so they are lowered outwards from i, touching only
+        the cells whose distance actually changes.
+        '''
+        self.clear_cache()
+        for dist in self.landmark_dists:
+            best = UNREACHED
+            for j in self.neighbours(i):
+                if dist[j] != UNREACHED and (best == UNREACHED or dist[j] + 1 < best):
+                    best = dist[j] + 1
+            if best == UNREACHED:
+                continue
+            dist[i] = best
+            queue = deque([i])
+            while queue:
+                u = queue.popleft()
+                d = dist[u] + 1
+                for v in self.neighbours(u):
+                    if dist[v] == UNREACHED or dist[v] > d:
+                        dist[v] = d
+                        queue.append(v)
+
+    def cell_closed(self, i: int) -> None:
+        '''
+        Update after flat index i has stopped being passable. For each
+        landmark, only cells whose every shortest route ran through i can
+        get farther away; those are found level by level outwards from i,
+        then given new distances from the unaffected cells around them.
+        '''
+        self.clear_cache()
+        if i in self.landmarks:
+            k = self.landmarks.index(i)
+            del self.landmarks[k]
+            del self.landmark_dists[k]
+        for dist in self.landmark_dists:
+            if dist[i] == UNREACHED:
+                continue
+            affected = {i}
+            queue = deque([i])
+            while queue:
+                u = queue.popleft()
+                for v in self.neighbours(u):
+                    if v not in affected and dist[v] == dist[u] + 1 and \
+                       not any(dist[p] == dist[v] - 1 and p not in affected
+                               for p in self.neighbours(v)):
+                        affected.add(v)
+                        queue.append(v)
+            dist[i] = UNREACHED
+            affected.discard(i)
+            for v in affected:
+                dist[v] = UNREACHED
+            heap = []
+            for v in affected:
+                for p in self.neighbours(v):
+                    if p not in affected and dist[p] != UNREACHED and \
+                       (dist[v] == UNREACHED or dist[p] + 1 < dist[v]):
+                        dist[v] = dist[p] + 1
+                if dist[v] != UNREACHED:
+                    heap.append((dist[v], v))
+            heapq.heapify(heap)
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                for v in self.neighbours(u):
+                    if v in affected and (dist[v] == UNREACHED or dist[v] > d + 1):
+                        dist[v] = d + 1
+                        heapq.heappush(heap, (d + 1, v))
+
+    def path(self, a: tuple, b: tuple) -> list:
+        '''
+        Return a shortest list of (x, y) positions from a to b (both
+        included), or None if b can not be reached from a.
+        '''
+        w = self.width
+        source = a[1] * w + a[0]
+        target = b[1] * w + b[0]
+        key = (min(source, target), max(source, target))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            flat = self.cache[key]
+        else:
+            flat = self._astar(key[0], key[1])
+            self._remember(key, flat)
+        if flat is None:
+            return None
+        if flat[0] != source:
+            flat = flat[::-1]
+        return [(i % w, i // w) for i in flat]
+
+    def distance(self, a: tuple, b: tuple) -> int:
+        '''
+        Return the number of moves on a shortest route from (x, y) position a
+        to b, or None if b can not be reached from a. Only the number is
+        cached, so a repeated query is a single dictionary lookup; a route
+        already cached by path() is used too, without converting it.
+        '''
+        w = self.width
+        source = a[1] * w + a[0]
+        target = b[1] * w + b[0]
+        key = (min(source, target), max(source, target), 'distance')
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        flat = self.cache.get(key[:2])
+        if flat is None:
+            flat = self._astar(key[0], key[1])
+        result = None if flat is None else len(flat) - 1
+        self._remember(key, result)
+        return result
+
+    def _astar(self, source: int, target: int) -> tuple:
+        '''
+        Return a tuple of flat indexes on a shortest route from source to
+        target found with ALT-guided A*, or None if there is no route.
+        '''
+        if not (self.passable[source] and self.passable[target]):
+            return None
+        h = self.lower_bound(source, target)
+        if h == UNREACHED:
+            return None
+        g = {source: 0}
+        parents = {source: None}
+        heap = [(h, 0, source)]
+        while heap:
+            f, gi, i = heapq.heappop(heap)
+            if i == target:
+                route = [i]
+                while parents[route[-1]] is not None:
+                    route.append(parents[route[-1]])
+                route.reverse()
+                return tuple(route)
+            if gi > g[i]:
+                continue
+            for j in self.neighbours(i):
+                gj = gi + 1
+                if gj < g.get(j, gj + 1):
+                    g[j] = gj
+                    parents[j] = i
+                    heapq.heappush(heap, (gj + self.lower_bound(j, target), gj, j))
+        return None
+
+    def bidirectional_distance(self, a: tuple, b: tuple) -> int:
+        '''
+        Return the number of moves on a shortest route from (x, y) position a
+        to b using a breadth-first search grown from both ends at once, or
+        None if b can not be reached from a. Results share the LRU cache.
+        '''
+        w = self.width
+        source = a[1] * w + a[0]
+        target = b[1] * w + b[0]
+        key = (min(source, target), max(source, target), 'bidirectional')
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        result = self._bidirectional(source, target)
+        self._remember(key, result)
+        return result
+
+    def _bidirectional(self, source: int, target: int) -> int:
+        '''
+        Return the distance between flat indexes source and target, always
+        expanding whichever search frontier is smaller.
+        '''
+        if not (self.passable[source] and self.passable[target]):
+            return None
+        if source == target:
+            return 0
+        seen = ({source: 0}, {target: 0})
+        frontiers = ([source], [target])
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            mine, other = seen[side], seen[1 - side]
+            next_frontier = []
+            best = None
+            for i in frontiers[side]:
+                d = mine[i] + 1
+                for j in self.neighbours(i):
+                    if j in other:
+                        total = d + other[j]
+                        if best is None or total < best:
+                            best = total
+                    if j not in mine:
+                        mine[j] = d
+                        next_frontier.append(j)
+            if best is not None:
+                return best
+            frontiers = (next_frontier, frontiers[1]) if side == 0 \
+                else (frontiers[0], next_frontier)
+        return None
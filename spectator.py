@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import threading
+
+
+def split_frame(text: str) -> list:
+    '''
+    Return the given printed board (one row per line, three characters per
+    cell, like a MazeGame or drillbot Map prints itself) as a list of rows
+    of cell strings.
+    '''
+    return [[line[i:i+3] for i in range(0, len(line), 3)]
+            for line in text.splitlines() if line]
+
+
+class Subscriber:
+    '''One connected viewer and the messages waiting to be sent to it.'''
+
+    def __init__(self, writer, max_pending: int) -> None:
+        self.writer = writer
+        self.queue = asyncio.Queue(max_pending)
+        self.coalesced = 0 # times this viewer fell behind since its queue last drained
+
+
+class Broadcaster:
+    '''
+    Fans live game frames out to any number of viewers over a local socket.
+
+    Each new viewer is sent one keyframe holding the whole board, then one
+    delta per published frame listing only the cells that changed. Messages
+    are JSON lines. A viewer whose queue fills up has its backlog replaced by
+    a single fresh keyframe; one that falls behind more than max_coalesce
+    times without ever emptying its queue is disconnected, so a slow viewer
+    never holds up the game or the other viewers.
+    '''
+
+    def __init__(self, max_pending: int = 64, max_coalesce: int = 8) -> None:
+        '''
+        Construct a Broadcaster queueing up to max_pending messages per
+        viewer, and dropping viewers that fall behind more than max_coalesce
+        times before catching up.
+        '''
+        self.max_pending = max_pending
+        self.max_coalesce = max_coalesce
+        self.subscribers = set()
+        self.board = []
+        self.seq = 0
+        self.loop = None
+        self.server = None
+        self._handlers = set()
+        self._thread = None
+
+    def _keyframe(self) -> bytes:
+        '''Return the message describing the whole current board.'''
+        return (json.dumps({'seq': self.seq, 'key': self.board}) + '\n').encode()
+
+    def publish(self, text: str) -> None:
+        '''
+        Send a printed board to every viewer. Safe to call from the thread
+        running the game: the work is handed over to the broadcaster's event
+        loop, so the caller only pays for scheduling it. Games use this as
+        an observer, e.g. game.observers.append(broadcaster.publish).
+        '''
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._publish, text)
+
+    def _publish(self, text: str) -> None:
+        '''Diff the new board against the last one and queue the result.'''
+        rows = split_frame(text)
+        self.seq += 1
+        if len(rows) != len(self.board) or \
+           any(len(a) != len(b) for a, b in zip(rows, self.board)):
+            self.board = rows
+            message = self._keyframe()
+        else:
+            changes = []
+            for y, (new_row, old_row) in enumerate(zip(rows, self.board)):
+                for x, (new, old) in enumerate(zip(new_row, old_row)):
+                    if new != old:
+                        changes.append([y, x, new])
+            self.board = rows
+            if not changes:
+                return
+            message = (json.dumps({'seq': self.seq, 'delta': changes}) + '\n').encode()
+
+        keyframe = None
+        for sub in list(self.subscribers):
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                sub.coalesced += 1
+                if sub.coalesced > self.max_coalesce:
+                    self._drop(sub, abort=True)
+                    continue
+                # throw the backlog away; one keyframe brings the viewer up to date
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                if keyframe is None:
+                    keyframe = self._keyframe()
+                sub.queue.put_nowait(keyframe)
+
+    def _drop(self, sub: Subscriber, abort: bool = False) -> None:
+        '''
+        Disconnect a viewer. With abort, unsent data is thrown away rather
+        than flushed, which a viewer that has stopped reading would never allow.
+        '''
+        self.subscribers.discard(sub)
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None) # wakes the viewer's handler so it can finish
+        if abort:
+            sub.writer.transport.abort()
+        else:
+            sub.writer.close()
+
+    async def _handle(self, reader, writer) -> None:
+        '''Serve one viewer until it disconnects or is dropped.'''
+        sub = Subscriber(writer, self.max_pending)
+        self._handlers.add(asyncio.current_task())
+        if self.board:
+            sub.queue.put_nowait(self._keyframe())
+        self.subscribers.add(sub)
+        try:
+            while True:
+                message = await sub.queue.get()
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+                if sub.queue.empty():
+                    sub.coalesced = 0 # caught up, so earlier falls behind are forgiven
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._drop(sub)
+            self._handlers.discard(asyncio.current_task())
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765,
+                    path: str = None) -> None:
+        '''
+        Start accepting viewers on the running event loop, on a Unix socket
+        at path if one is given, otherwise on the TCP host and port.
+        '''
+        self.loop = asyncio.get_running_loop()
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+
+    def start(self, host: str = '127.0.0.1', port: int = 8765, path: str = None) -> None:
+        '''
+        Run the broadcaster on its own event loop in a background thread, so
+        a blocking game loop can publish to it.
+        '''
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.serve(host, port, path))
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    async def close(self) -> None:
+        '''
+        Stop accepting viewers and disconnect every current one, aborting
+        the connections so a viewer that has stopped reading can not keep
+        its handler waiting forever.
+        '''
+        self.server.close()
+        for sub in list(self.subscribers):
+            self._drop(sub, abort=True)
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def stop(self) -> None:
+        '''Close the broadcaster started with start() and its background thread.'''
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+async def watch(host: str = '127.0.0.1', port: int = 8765, path: str = None) -> None:
+    '''Connect to a Broadcaster and print each board as it changes.'''
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    board = []
+    async for line in reader:
+        message = json.loads(line)
+        if 'key' in message:
+            board = message['key']
+        else:
+            for y, x, cell in message['delta']:
+                board[y][x] = cell
+        print('\n'.join(''.join(row) for row in board))
+        print('------------')
+
+
+def main():
+    '''Watch a live game from the command line.'''
+    parser = argparse.ArgumentParser(description='Watch a live maze or drillbot game.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--path', default=None, help='Unix socket to connect to instead')
+    args = parser.parse_args()
+    try:
+        asyncio.run(watch(args.host, args.port, args.path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+try:
+    import msvcrt # Windows
+except ImportError:
+    msvcrt = None
+    import select
+
+SPIN = 0.001 # seconds before a deadline where we stop sleeping and spin instead
+
+
+class KeyReader:
+    '''
+    Reads moves from the keyboard without blocking. A move is typed the same
+    way the games already ask for one (a letter, then Enter); read_key
+    returns it once the line is complete, and None until then.
+    '''
+
+    def __init__(self) -> None:
+        self.typed = ''
+
+    def read_key(self):
+        '''
+        Return the upper-cased first letter of the next completely entered
+        line, or None if no whole line has been typed yet.
+        '''
+        if msvcrt is not None:
+            while msvcrt.kbhit():
+                ch = msvcrt.getwche()
+                if ch == '\r':
+                    print()
+                    ch = '\n'
+                self.typed += ch
+        elif select.select([sys.stdin], [], [], 0)[0]:
+            self.typed += os.read(sys.stdin.fileno(), 1024).decode(errors='replace')
+        if '\n' not in self.typed:
+            return None
+        line, self.typed = self.typed.split('\n', 1)
+        return line.strip()[:1].upper() or None
+
+
+class TickLoop:
+    '''
+    Calls a step function at a fixed rate. Each tick has a deadline; the
+    loop sleeps until it, then spins for the last moment so it starts close
+    to on time. If a step runs long, the following ticks run back to back
+    to catch up, unless the loop has fallen more than max_catchup ticks
+    behind, in which case the missed ticks are dropped (and counted) and
+    the schedule restarts from now. How late each tick starts is recorded
+    so the jitter can be reported.
+    '''
+
+    def __init__(self, step, rate: float = 20, max_catchup: int = 5) -> None:
+        '''
+        Construct a TickLoop calling step() rate times per second, running
+        at most max_catchup late ticks back to back before dropping some.
+        '''
+        self.step = step
+        self.period = 1 / rate
+        self.max_catchup = max_catchup
+        self.ticks = 0
+        self.dropped = 0
+        self.late_mean = 0.0
+        self._late_m2 = 0.0
+        self.late_max = 0.0
+
+    def _record(self, late: float) -> None:
+        '''Add how late one tick started to the running jitter statistics.'''
+        self.ticks += 1
+        delta = late - self.late_mean
+        self.late_mean += delta / self.ticks
+        self._late_m2 += delta * (late - self.late_mean)
+        self.late_max = max(self.late_max, late)
+
+    def run(self, done) -> None:
+        '''Run ticks until done() returns True.'''
+        clock = time.perf_counter
+        deadline = clock()
+        while not done():
+            now = clock()
+            if deadline - now > SPIN:
+                time.sleep(deadline - now - SPIN)
+            while clock() < deadline:
+                pass
+            self._record(clock() - deadline)
+            self.step()
+
+            deadline += self.period
+            behind = clock() - deadline
+            if behind > self.period * self.max_catchup:
+                missed = int(behind / self.period)
+                self.dropped += missed
+                deadline += missed * self.period
+
+    def report(self) -> str:
+        '''Return a summary of the ticks run, dropped, and their jitter.'''
+        stdev = math.sqrt(self._late_m2 / self.ticks) if self.ticks else 0.0
+        return 'ticks: {}, dropped: {}, lateness mean {:.3f} ms, stdev {:.3f} ms, max {:.3f} ms'.format(
+            self.ticks, self.dropped, self.late_mean * 1000, stdev * 1000, self.late_max * 1000)
+
+
+def play_realtime(game, rate: float = 20) -> TickLoop:
+    '''
+    Play a MazeGame (any variant) in real time: on every tick the game's
+    tick() is given the move typed since the last tick, if any, so monsters
+    and computer players act without waiting for the keyboard.
+    '''
+    reader = KeyReader()
+    loop = TickLoop(lambda: game.tick(reader.read_key()), rate)
+    game.show()
+    loop.run(game.is_over)
+    print('Game over.')
+    print(loop.report())
+    return loop
+
+
+def main():
+    '''Prompt-free real-time version of the maze games' main().'''
+    parser = argparse.ArgumentParser(description='Play a maze game in real time.')
+    parser.add_argument('game', choices=['1player', '2player', 'fight'])
+    parser.add_argument('--width', type=int, default=5)
+    parser.add_argument('--height', type=int, default=5)
+    parser.add_argument('--rate', type=float, default=20, help='ticks per second')
+    parser.add_argument('--name', default='Player')
+    args = parser.parse_args()
+
+    if args.game == '1player':
+        import maze_1player
+        game = maze_1player.MazeGame(args.width, args.height,
+                                     maze_1player.Player(args.name, 0, 0))
+    elif args.game == '2player':
+        import maze_2player
+        game = maze_2player.MazeGame(args.width, args.height,
+                                     maze_2player.make_player(args.name, 'u', 0, 0),
+                                     maze_2player.make_player('Computer', 'c', 0, 1))
+    else:
+        import random
+        from MazeFight import MazeFight
+        monster = MazeFight.Monster(random.randint(0, args.width-2), random.randint(1, args.height-1))
+        game = MazeFight.MazeGame(args.width, args.height,
+                                  MazeFight.Player(args.name, 0, 0), monster)
+    play_realtime(game, args.rate)
+
+
+if __name__ == '__main__':
+    main()
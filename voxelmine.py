@@ -0,0 +1,208 @@
+from collections import OrderedDict
+
+from drillbot import GEMS, TILE_DESCS
+
+ICONS = ['(_)', '(r)', '(s)', '(e)', '(d)', '(x)'] # a voxel's byte is its index in here
+CODES = {icon: code for code, icon in enumerate(ICONS)}
+DIRT = CODES['(_)']
+WALL = CODES['(x)']
+
+
+class VoxelMap:
+    '''
+    A 3D mine of width x height x depth voxels, for drilling downwards
+    through layers. Voxel (x, y, z) is stored as one byte at flat index
+    z * width * height + y * width + x of a file on disk, layer z being the
+    z-th block of width * height bytes. Only the most recently used layers
+    are held in memory (by default the one the bot is on and those just
+    above and below it); changed layers are written back when they are
+    evicted or on flush().
+    '''
+
+    def __init__(self, path: str, width: int, height: int, depth: int,
+                 window: int = 3) -> None:
+        '''
+        Open the mine stored at path, keeping at most window layers in memory.
+        '''
+        self.path = path
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.layer_size = width * height
+        self.window = max(window, 3) # the bot's layer and the ones above and below
+        self.layers = OrderedDict()
+        self.dirty = set()
+        self.file = open(path, 'r+b')
+
+    @classmethod
+    def create(cls, path: str, layers: list, window: int = 3) -> 'VoxelMap':
+        '''
+        Write a mine to path from a list of layers (top first), each in the
+        same list-of-lists-of-icons form a drillbot Map takes, and open it.
+        '''
+        with open(path, 'wb') as f:
+            for layer in layers:
+                f.write(bytes(CODES[icon] for row in layer for icon in row))
+        return cls(path, len(layers[0][0]), len(layers[0]), len(layers), window)
+
+    def __len__(self) -> int:
+        '''Return the number of voxels in the mine.'''
+        return self.layer_size * self.depth
+
+    def index(self, x: int, y: int, z: int) -> int:
+        '''Return the flat index of voxel (x, y, z).'''
+        return z * self.layer_size + y * self.width + x
+
+    def coords(self, i: int) -> tuple:
+        '''Return the (x, y, z) position of flat index i.'''
+        z, rest = divmod(i, self.layer_size)
+        y, x = divmod(rest, self.width)
+        return x, y, z
+
+    def layer(self, z: int) -> bytearray:
+        '''Return layer z, reading it from disk (and evicting the least
+        recently used layer) if it is not already in memory.'''
+        if z in self.layers:
+            self.layers.move_to_end(z)
+            return self.layers[z]
+        while len(self.layers) >= self.window:
+            old, data = self.layers.popitem(last=False)
+            self._write(old, data)
+        self.file.seek(z * self.layer_size)
+        data = bytearray(self.file.read(self.layer_size))
+        self.layers[z] = data
+        return data
+
+    def _write(self, z: int, data: bytearray) -> None:
+        '''Write layer z back to disk if it has been changed.'''
+        if z in self.dirty:
+            self.file.seek(z * self.layer_size)
+            self.file.write(data)
+            self.dirty.discard(z)
+
+    def kind(self, i: int) -> int:
+        '''Return the code (an index into ICONS) of the voxel at flat index i.'''
+        z, rest = divmod(i, self.layer_size)
+        return self.layer(z)[rest]
+
+    def set_kind(self, i: int, code: int) -> None:
+        '''Change the voxel at flat index i to the given code.'''
+        z, rest = divmod(i, self.layer_size)
+        self.layer(z)[rest] = code
+        self.dirty.add(z)
+
+    def find_adj(self, i: int) -> list:
+        '''
+        Return the flat indexes of the non-wall voxels next to flat index i:
+        north, south, east and west on the same layer first, then below,
+        then above. Drillbots can NOT move diagonally.
+        '''
+        w, size = self.width, self.layer_size
+        z, rest = divmod(i, size)
+        y, x = divmod(rest, w)
+        here = self.layer(z)
+        adj = []
+        if y > 0 and here[rest - w] != WALL:
+            adj.append(i - w)
+        if y + 1 < self.height and here[rest + w] != WALL:
+            adj.append(i + w)
+        if x + 1 < w and here[rest + 1] != WALL:
+            adj.append(i + 1)
+        if x > 0 and here[rest - 1] != WALL:
+            adj.append(i - 1)
+        if z + 1 < self.depth and self.layer(z + 1)[rest] != WALL:
+            adj.append(i + size)
+        if z > 0 and self.layer(z - 1)[rest] != WALL:
+            adj.append(i - size)
+        return adj
+
+    def flush(self) -> None:
+        '''Write every changed layer back to disk.'''
+        for z, data in self.layers.items():
+            self._write(z, data)
+        self.file.flush()
+
+    def close(self) -> None:
+        '''Flush changes and close the file.'''
+        self.flush()
+        self.file.close()
+
+    def __repr__(self) -> str:
+        '''Return a string representation of the layers currently in memory.'''
+        s = ''
+        for z in sorted(self.layers):
+            s += 'layer {}\n'.format(z)
+            data = self.layers[z]
+            for y in range(self.height):
+                row = data[y * self.width:(y + 1) * self.width]
+                s += ''.join(ICONS[code] for code in row) + '\n'
+        return s
+
+
+class VoxelDrillBot:
+    '''
+    A DrillBot for VoxelMaps. It works on flat voxel indexes instead of Tile
+    objects and explores depth-first, trying the voxels beside it on its own
+    layer first, then the one below, then the one above, from whichever
+    voxel it is on; so it can drill down from any dead end, before its own
+    layer is finished.
+
+    Instead of a stack of the path back, the bot keeps one 4-bit code per
+    voxel (half a byte per voxel, fixed up front): 0 for not visited yet,
+    otherwise which way the bot came in, so at a dead end it backtracks by
+    reading the code of the voxel it is on.
+    '''
+
+    START = 15 # the came_from code of the voxel exploring started from
+
+    def __init__(self, m: VoxelMap) -> None:
+        '''Put a DrillBot on the given VoxelMap with an empty storage.'''
+        self.map = m
+        self.storage = {}
+        self.distance = 0
+        self.came_from = bytearray(len(m) // 2 + 1)
+        # the flat index offsets of the six moves, numbered from 1 (equal offsets share a number)
+        self.codes = {}
+        for step in (-m.width, m.width, 1, -1, m.layer_size, -m.layer_size):
+            self.codes.setdefault(step, len(self.codes) + 1)
+        self.steps = {code: step for step, code in self.codes.items()}
+
+    def _came_from(self, i: int) -> int:
+        '''Return the came_from code of flat index i.'''
+        return self.came_from[i >> 1] >> ((i & 1) << 2) & 15
+
+    def was_visited(self, i: int) -> bool:
+        '''Return whether the bot has been to flat index i.'''
+        return self._came_from(i) != 0
+
+    def visit(self, i: int, code: int = START) -> None:
+        '''
+        Move the bot to flat index i, arriving by the move numbered code,
+        collecting any gem there.
+        '''
+        kind = self.map.kind(i)
+        desc = TILE_DESCS[ICONS[kind]]
+        if desc in GEMS:
+            self.storage[desc] = self.storage.get(desc, 0) + 1
+            self.map.set_kind(i, DIRT)
+        self.came_from[i >> 1] |= code << ((i & 1) << 2)
+
+    def explore(self, start: int) -> None:
+        '''
+        Visit every voxel reachable from flat index start, then climb back
+        to start along the way the bot came, counting every move in distance.
+        '''
+        self.visit(start)
+        here = start
+        while True:
+            for adj in self.map.find_adj(here):
+                if not self.was_visited(adj):
+                    self.visit(adj, self.codes[adj - here])
+                    here = adj
+                    self.distance += 1
+                    break
+            else:
+                if here == start:
+                    return
+                here -= self.steps[self._came_from(here)] # step back the way we came
+                self.distance += 1